@@ -1,10 +1,15 @@
 # app.py
 import streamlit as st
-from src.pipeline import run_pipeline
+from src.pipeline import iter_pipeline, build_components, BACKENDS, STYLE_NAMES
+from collections import OrderedDict
 from pathlib import Path
+import hashlib
 import streamlit.components.v1 as components
-import json
-from charset_normalizer import from_bytes
+from src.decoding import decode_bytes
+
+# Finished results shared by all sessions, keyed by (file hash, model, backend, lang)
+MAX_CACHED_RESULTS = 32
+LT_WORKERS = 2
 
 st.set_page_config(page_title="📝 Text Style Transformer", layout="wide")
 
@@ -14,6 +19,99 @@ Upload a text file, select a language and model, and run the pipeline.
 The app will correct grammar, transform styles, calculate readability, and show a diagram.
 """)
 
+@st.cache_resource(show_spinner="Loading model and grammar checker...")
+def get_components(model_name, lang, mode="lm_studio"):
+    """One StyleTransformer and TextPreprocessor (with its model clients) per model, backend and language, kept across reruns."""
+    # Every model shares the same pooled LanguageTool servers; HF weights are shared through the model registry
+    return build_components(model_name=model_name, lang=lang, lt_workers=LT_WORKERS, mode=mode)
+
+
+@st.cache_resource
+def get_result_cache():
+    return OrderedDict()
+
+
+@st.cache_data(show_spinner=False)
+def decode_upload(raw_data):
+    text, encoding = decode_bytes(raw_data)
+    return text
+
+
+def store_result(key, result):
+    """Remember a finished run for this session and for later sessions (oldest shared entries are dropped)."""
+    st.session_state.setdefault("results", {})[key] = result
+    cache = get_result_cache()
+    cache[key] = result
+    cache.move_to_end(key)
+    while len(cache) > MAX_CACHED_RESULTS:
+        cache.popitem(last=False)
+
+
+def lookup_result(key):
+    result = st.session_state.get("results", {}).get(key)
+    if result is None:
+        result = get_result_cache().get(key)
+        if result is not None:
+            st.session_state.setdefault("results", {})[key] = result
+    return result
+
+
+def render_corrections(corrections):
+    if corrections:
+        total_issues = sum(corr.get("num_issues", 1) for corr in corrections)
+
+        st.subheader(f"🛠️ Corrections Summary — {len(corrections)} sentences, {total_issues} total issues")
+
+        for i, corr in enumerate(corrections, 1):
+            st.markdown(f"**{i}. Issues: {corr.get('num_issues', '?')}**")
+            st.markdown(f"- Original: {corr['original']}")
+            st.markdown(f"- Corrected: {corr['corrected']}")
+            st.markdown("---")
+    else:
+        st.info("No corrections were found in the text.")
+
+
+def render_scores(scores):
+    st.subheader("📊 Readability Scores")
+    for style, score in scores.items():
+        st.markdown(f"#### {style.title()} Style")
+        for metric, value in score.items():
+            try:
+                st.write(f"**{metric}**: {float(value):.2f}")
+            except (ValueError, TypeError):
+                st.write(f"**{metric}**: {value}")
+
+
+def render_diagram(diagram_html):
+    if diagram_html:
+        st.subheader("🧩 Processing Diagram with Previews")
+        components.html(diagram_html, height=800, scrolling=True)
+    else:
+        st.warning("Diagram not found.")
+
+
+def render_metrics(metrics):
+    with st.expander("⏱️ Stage timings and counters"):
+        st.table([
+            {"stage": name, "calls": stats["count"], "total (s)": round(stats["total_seconds"], 3),
+             "max (s)": round(stats["max_seconds"], 3)}
+            for name, stats in sorted(metrics["stages"].items(), key=lambda item: -item[1]["total_seconds"])
+        ])
+        st.json(metrics["counters"])
+
+
+def render_result(result):
+    """Show a finished run straight from memory."""
+    render_corrections(result["corrections"])
+    st.subheader("📄 Transformed Text Outputs")
+    for style, text in result["outputs"].items():
+        st.markdown(f"### {style.title()} Style")
+        st.text_area(f"{style.title()} Output", value=text, height=300)
+    render_scores(result["scores"])
+    render_diagram(result["diagram_html"])
+    render_metrics(result["metrics"])
+
+
 # File uploader
 uploaded_file = st.file_uploader("📄 Upload a text file (.txt)", type=["txt"])
 
@@ -27,81 +125,101 @@ model_options = [
 ]
 model_choice = st.selectbox("🤖 Select Model", model_options)
 
+# LM Studio models run on the server; others can also be loaded in-process with HuggingFace
+backend_labels = {"lm_studio": "LM Studio server", "hf": "HuggingFace (in-process)"}
+backend_choice = st.radio("⚙️ Select Backend", BACKENDS, format_func=backend_labels.get,
+                          index=0 if model_choice.startswith("LM Studio:") else 1,
+                          disabled=model_choice.startswith("LM Studio:"))
+
 # Language selection
 lang_choice = st.radio("🌐 Select Language", ["en", "tr"])
 
 if uploaded_file:
     input_path = Path("data/input_texts") / uploaded_file.name
-    input_path.parent.mkdir(parents=True, exist_ok=True)
-
-    raw_data = uploaded_file.read()
-    results = from_bytes(raw_data)
-    best_guess = results.best()
-
-    if best_guess is not None:
-        encoding = best_guess.encoding
-        file_text = raw_data.decode(encoding, errors='replace')
-    else:
-        file_text = raw_data.decode('utf-8', errors='replace')
-
-    # Save file as UTF-8
-    input_path.write_text(file_text, encoding="utf-8")
-
-    st.success(f"File saved: {input_path}")
+    raw_data = uploaded_file.getvalue()
+    file_text = decode_upload(raw_data)
+    result_key = (hashlib.sha256(raw_data).hexdigest(), model_choice, backend_choice, lang_choice)
 
     # Full file preview
     st.subheader("📄 Input File Preview")
     st.text_area("Full Input Text", value=file_text, height=300)
 
-    if st.button("🚀 Run Pipeline"):
-        with st.spinner("Processing..."):
-            outputs, scores = run_pipeline(str(input_path), model_name=model_choice, lang=lang_choice)
+    cached_result = lookup_result(result_key)
+    run_clicked = st.button("🚀 Run Pipeline")
 
-        st.success("✅ Pipeline completed successfully!")
+    if cached_result is not None:
+        # Same file, model, backend and language as an earlier run: show it without calling the model again
+        render_result(cached_result)
+        st.success("✅ Showing the results of an earlier run.")
 
-        corrections_file = Path("data/outputs") / f"{input_path.stem}_corrections.json"
+    elif run_clicked:
+        # Save file as UTF-8
+        input_path.parent.mkdir(parents=True, exist_ok=True)
+        input_path.write_text(file_text, encoding="utf-8")
+        st.success(f"File saved: {input_path}")
 
-        if corrections_file.exists():
-            with open(corrections_file, "r", encoding="utf-8") as f:
-                corrections = json.load(f)
+        transformer, preprocessor = get_components(model_choice, lang_choice, backend_choice)
 
-            if corrections:
-                total_issues = sum(corr.get("num_issues", 1) for corr in corrections)
-
-                st.subheader(f"🛠️ Corrections Summary — {len(corrections)} sentences, {total_issues} total issues")
-
-                for i, corr in enumerate(corrections, 1):
-                    st.markdown(f"**{i}. Issues: {corr.get('num_issues', '?')}**")
-                    st.markdown(f"- Original: {corr['original']}")
-                    st.markdown(f"- Corrected: {corr['corrected']}")
-                    st.markdown("---")
-            else:
-                st.info("No corrections were found in the text.")
-        else:
-            st.warning("Corrections JSON not found.")
-
-        # Display transformed outputs
+        # Results are rendered stage by stage as the pipeline yields them
+        progress = st.progress(0.0, text="Correcting grammar...")
+        corrections_area = st.container()
         st.subheader("📄 Transformed Text Outputs")
-        for style, content in outputs.items():
+        style_areas = {}
+        for style in STYLE_NAMES:
             st.markdown(f"### {style.title()} Style")
-            st.text_area(f"{style.title()} Output", value=content, height=300)
-
-        # Display readability scores
-        st.subheader("📊 Readability Scores")
-        for style, score in scores.items():
-            st.markdown(f"#### {style.title()} Style")
-            for metric, value in score.items():
-                try:
-                    st.write(f"**{metric}**: {float(value):.2f}")
-                except (ValueError, TypeError):
-                    st.write(f"**{metric}**: {value}")
-
-        # Display diagram (iframe)
-        diagram_path = Path("data/outputs") / f"{input_path.stem}_pipeline_diagram.html"
-        if diagram_path.exists():
-            st.subheader("🧩 Processing Diagram with Previews")
-            components.html(diagram_path.read_text(encoding="utf-8"), height=800, scrolling=True)
-        else:
-            st.warning("Diagram not found.")
+            style_areas[style] = st.empty()
+            style_areas[style].info("Waiting for the model...")
+        scores_area = st.container()
+        diagram_area = st.container()
+
+        result = {}
+        chunks_done = 0
+        for event in iter_pipeline(str(input_path), model_name=model_choice, lang=lang_choice, incremental=True,
+                                   transformer=transformer, preprocessor=preprocessor, text=file_text,
+                                   stream=True):
+            if event["type"] == "corrections":
+                result["corrections"] = event["corrections"]
+                progress.progress(0.1, text="Transforming styles...")
+                with corrections_area:
+                    render_corrections(event["corrections"])
+
+            elif event["type"] == "partial":
+                # Text appears while the model is still writing the chunk
+                style_areas[event["style"]].markdown(
+                    f"*Writing chunk {event['index'] + 1}/{event['total']}...*\n\n{event['preview']}"
+                )
+
+            elif event["type"] == "chunk":
+                chunks_done += 1
+                total = event["total"] * len(STYLE_NAMES)
+                progress.progress(0.1 + 0.8 * min(chunks_done / total, 1.0),
+                                  text=f"Transformed {chunks_done}/{total} chunks...")
+                style_areas[event["style"]].markdown(
+                    f"*Chunk {event['index'] + 1}/{event['total']} ready:*\n\n{event['preview']}"
+                )
+
+            elif event["type"] == "style":
+                style = event["style"]
+                style_areas[style].text_area(f"{style.title()} Output", value=event["text"], height=300)
+
+            elif event["type"] == "readability":
+                progress.progress(0.95, text="Generating diagram...")
+                with scores_area:
+                    render_scores(event["scores"])
+
+            elif event["type"] == "diagram":
+                result["diagram_html"] = event["html"]
+                with diagram_area:
+                    render_diagram(event["html"])
+
+            elif event["type"] == "done":
+                result["outputs"] = event["outputs"]
+                result["scores"] = event["scores"]
+                result["metrics"] = event["metrics"]
+                render_metrics(event["metrics"])
+
+        store_result(result_key, result)
+        progress.progress(1.0, text="Done")
+        st.success("✅ Pipeline completed successfully!")
 else:
-    st.info("Please upload a text file to begin.")
+    st.info("Please upload a text file to begin.")
\ No newline at end of file
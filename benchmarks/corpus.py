@@ -0,0 +1,89 @@
+# benchmarks/corpus.py
+"""
+Deterministic English and Turkish benchmark corpora.
+
+Text is assembled from fixed word lists with a seeded RNG, so every run (and every machine)
+benchmarks exactly the same input for a given language and size. A small share of words carry
+a typo so the grammar checkers have something to correct.
+"""
+import random
+import re
+
+WORDS = {
+    "en": {
+        "subjects": ["The teacher", "A student", "Our team", "The city council", "My neighbour", "The researcher",
+                     "Every visitor", "The small company", "This report", "The old library"],
+        "verbs": ["explains", "describes", "improves", "changes", "discusses", "reviews", "supports", "questions",
+                  "measures", "presents"],
+        "objects": ["the new policy", "a difficult problem", "the results of the study", "the local history",
+                    "an important decision", "the weekly schedule", "the final design", "a simple method",
+                    "the public transport system", "the annual budget"],
+        "tails": ["in great detail", "before the meeting", "with a lot of care", "for the first time",
+                  "during the long winter", "after many discussions", "without any help", "at the end of the day"],
+        "typos": {"the": "teh", "their": "thier", "receive": "recieve", "a lot": "alot", "with": "wiht"},
+    },
+    "tr": {
+        "subjects": ["Öğretmen", "Bir öğrenci", "Ekibimiz", "Belediye meclisi", "Komşum", "Araştırmacı",
+                     "Her ziyaretçi", "Küçük şirket", "Bu rapor", "Eski kütüphane"],
+        "objects": ["yeni politikayı", "zor bir sorunu", "çalışmanın sonuçlarını", "yerel tarihi",
+                    "önemli bir kararı", "haftalık programı", "son tasarımı", "basit bir yöntemi",
+                    "toplu taşıma sistemini", "yıllık bütçeyi"],
+        "tails": ["ayrıntılı olarak", "toplantıdan önce", "büyük bir dikkatle", "ilk kez",
+                  "uzun kış boyunca", "birçok tartışmadan sonra", "hiç yardım almadan", "günün sonunda"],
+        "verbs": ["açıklıyor", "anlatıyor", "geliştiriyor", "değiştiriyor", "tartışıyor", "inceliyor",
+                  "destekliyor", "sorguluyor", "ölçüyor", "sunuyor"],
+        "typos": {"bir": "bi", "önemli": "önemlli", "ayrıntılı": "ayrıntlı", "toplantıdan": "toplantidan",
+                  "öğrenci": "ögrenci"},
+    },
+}
+
+SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(B|KB|MB)?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 * 1024}
+
+
+def parse_size(value):
+    """Parse '1KB', '100 kb', '10MB' or a plain byte count into bytes."""
+    match = SIZE_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[(match.group(2) or "B").upper()])
+
+
+def format_size(size):
+    for unit in ("MB", "KB"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def _sentence(rng, words):
+    if words is WORDS["tr"]:
+        # Turkish is verb-final
+        parts = [rng.choice(words["subjects"]), rng.choice(words["tails"]), rng.choice(words["objects"]),
+                 rng.choice(words["verbs"])]
+    else:
+        parts = [rng.choice(words["subjects"]), rng.choice(words["verbs"]), rng.choice(words["objects"]),
+                 rng.choice(words["tails"])]
+    sentence = " ".join(parts)
+    if rng.random() < 0.1:
+        wrong = rng.choice(list(words["typos"]))
+        sentence = re.sub(rf"\b{re.escape(wrong)}\b", words["typos"][wrong], sentence, count=1)
+    return sentence + rng.choice([".", ".", ".", "!", "?"])
+
+
+def generate_corpus(lang="en", size=1024, seed=0):
+    """Return a text of about `size` UTF-8 bytes, in paragraphs of 3-7 sentences."""
+    rng = random.Random(f"{lang}-{seed}")
+    words = WORDS[lang]
+    paragraphs = []
+    total = 0
+    while True:
+        paragraph = " ".join(_sentence(rng, words) for _ in range(rng.randint(3, 7)))
+        length = len(paragraph.encode("utf-8")) + 2
+        if total + length > size and paragraphs:
+            break
+        paragraphs.append(paragraph)
+        total += length
+        if total >= size:
+            break
+    return "\n\n".join(paragraphs)
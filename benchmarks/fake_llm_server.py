@@ -0,0 +1,114 @@
+# benchmarks/fake_llm_server.py
+"""
+Local stand-in for LM Studio's OpenAI-compatible API, for benchmarks.
+
+POST /v1/chat/completions answers every prompt without a model:
+- numbered-list prompts (batched Turkish correction) get their numbered lines back;
+- "Rewrite the following text ...:\\n<text>\\nReturn only ..." prompts get <text> back.
+Each reply waits `latency_ms` plus `token_ms` per output word to imitate generation, and reports
+OpenAI-style token usage. `"stream": true` requests are answered as server-sent events.
+
+    python benchmarks/fake_llm_server.py --port 8099 --latency-ms 50
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NUMBERED_LINE = re.compile(r"^\s*\d+\s*[.)]\s*\S")
+WORD = re.compile(r"\S+\s*")
+
+
+def fake_reply(prompt):
+    """The text a perfect no-op model would return for one of the pipeline's prompts."""
+    lines = prompt.splitlines()
+    numbered = [line for line in lines if NUMBERED_LINE.match(line)]
+    if numbered:
+        return "\n".join(numbered)
+    # Instruction line, text, closing instruction line
+    if len(lines) >= 3:
+        return "\n".join(lines[1:-1])
+    return prompt
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    token_latency = 0.0
+    # "length" makes every reply look cut off at its max_tokens budget
+    finish_reason = "stop"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+        reply = fake_reply(prompt)
+        pieces = WORD.findall(reply)
+        usage = {
+            "prompt_tokens": len(WORD.findall(prompt)),
+            "completion_tokens": len(pieces),
+            "total_tokens": len(WORD.findall(prompt)) + len(pieces)
+        }
+        time.sleep(self.latency)
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for piece in pieces:
+                time.sleep(self.token_latency)
+                chunk = {"choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            final = {"choices": [{"index": 0, "delta": {}, "finish_reason": self.finish_reason}], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            self.close_connection = True
+            return
+
+        time.sleep(self.token_latency * len(pieces))
+        payload = json.dumps({
+            "object": "chat.completion",
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": self.finish_reason}],
+            "usage": usage
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(port=0, latency_ms=0.0, token_ms=0.0, host="127.0.0.1", handler=FakeLLMHandler):
+    """
+    Start the fake server in a background thread. Returns (server, base_url).
+    `handler` may be a FakeLLMHandler subclass, e.g. one that fails some requests in tests.
+    """
+    handler = type("Handler", (handler,), {"latency": latency_ms / 1000, "token_latency": token_ms / 1000})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible completion server for benchmarks.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay before every reply")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Extra delay per generated word")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency_ms, args.token_ms)
+    print(f"Fake LLM server listening at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
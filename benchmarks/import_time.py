@@ -0,0 +1,97 @@
+# benchmarks/import_time.py
+"""
+Import-time benchmark for the CLI cold start.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter, reports the total
+import time and the slowest top-level imports, and fails if a heavy dependency that only
+some backends need is imported eagerly, or if the total exceeds --max-ms.
+The same interpreter also builds an LM Studio StyleTransformer, as every CLI run does, so
+imports triggered by constructing the LM Studio backend are caught as well (--no-construct skips it).
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module src.pipeline --max-ms 800
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported when the backend or stage that needs them runs
+LAZY_MODULES = ("torch", "transformers", "plotly", "networkx", "language_tool_python", "nltk")
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# Constructing the LM Studio backend must not pull in the HF-only dependencies either
+CONSTRUCT_LM_STUDIO = "from src.style_transform import StyleTransformer; StyleTransformer(model_name={!r})"
+
+
+def measure(module, runs=3, model_name=None):
+    """
+    Return (best total microseconds, {top-level package: self-time us}) over `runs` cold imports.
+    With `model_name`, an LM Studio StyleTransformer is also constructed after the import.
+    """
+    code = f"import {module}"
+    if model_name:
+        code += "; " + CONSTRUCT_LM_STUDIO.format(model_name)
+    best_total = None
+    best_packages = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+        packages = {}
+        total = 0
+        for line in result.stderr.splitlines():
+            match = LINE.match(line)
+            if not match:
+                continue
+            self_time, cumulative, name = int(match.group(1)), int(match.group(2)), match.group(4)
+            root = name.split(".")[0]
+            # Self time per top-level package shows where the import cost actually goes
+            packages[root] = packages.get(root, 0) + self_time
+            if name == module:
+                total = cumulative
+        if best_total is None or total < best_total:
+            best_total, best_packages = total, packages
+    return best_total, best_packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the pipeline.")
+    parser.add_argument("--module", default="src.pipeline", help="Module to import")
+    parser.add_argument("--runs", type=int, default=3, help="Cold imports to run; the fastest is reported")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the import takes longer than this")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest packages to list")
+    parser.add_argument("--model", default="LM Studio: TheBloke/phi-2-GGUF",
+                        help="LM Studio model the constructed StyleTransformer uses")
+    parser.add_argument("--no-construct", action="store_true", help="Only import the module")
+    args = parser.parse_args()
+
+    total, packages = measure(args.module, args.runs, None if args.no_construct else args.model)
+    label = f"import {args.module}" + ("" if args.no_construct else " + LM Studio StyleTransformer")
+    print(f"{label}: {total / 1000:.1f} ms (best of {args.runs})")
+    for name, micros in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<28} {micros / 1000:8.1f} ms")
+
+    failed = False
+    eager = [name for name in LAZY_MODULES if name in packages]
+    if eager:
+        where = "" if args.no_construct else " (import plus LM Studio StyleTransformer)"
+        print(f"FAIL: imported eagerly{where}: {', '.join(eager)}")
+        failed = True
+    if args.max_ms is not None and total / 1000 > args.max_ms:
+        print(f"FAIL: {total / 1000:.1f} ms exceeds the {args.max_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark suite for the pipeline and its stages.
+
+Generates deterministic English and Turkish corpora (benchmarks/corpus.py), starts a fake
+OpenAI-compatible server with configurable latency (benchmarks/fake_llm_server.py) and runs every
+(benchmark, language, size) case in a fresh interpreter, so peak RSS is measured per case.
+Reports median time, p50/p99 latency, throughput and peak RSS, and compares the medians with a
+saved baseline.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1KB,1MB,10MB --langs tr --benchmarks readability,pipeline
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --fail-on-regression --tolerance 0.15
+
+Benchmarks:
+  decode       src.decoding.read_text on the corpus file
+  split        sentence segmentation
+  chunking     StyleTransformer.split_into_chunks for all three styles
+  merge        StyleTransformer.merge_chunks over the (untransformed) chunks
+  correction   TextPreprocessor.correct_text (LanguageTool for en, the fake LLM for tr)
+  readability  get_readability_scores
+  pipeline     the full run_pipeline against the fake server; p50/p99 are per-chunk model latencies
+               and there is no warm-up run, so the time includes a cold start
+
+A case that cannot run here (e.g. no Java/LanguageTool or NLTK punkt data) is reported as skipped.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+sys.path[:0] = [str(ROOT), str(BENCH_DIR)]
+
+from corpus import format_size, generate_corpus, parse_size  # noqa: E402
+from fake_llm_server import start_server  # noqa: E402
+
+BENCHMARKS = ("decode", "split", "chunking", "merge", "correction", "readability", "pipeline")
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+BENCH_MODEL = "LM Studio: benchmark-model"
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+        except Exception:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_case(bench, lang, text, path, base_url):
+    """Return a zero-argument callable that runs one iteration of `bench`."""
+    from src.llm_client import LMStudioClient
+    from src.style_transform import StyleTransformer
+
+    styles = ["academic", "simple", "child-friendly"]
+
+    if bench == "decode":
+        from src.decoding import read_text
+        return lambda: read_text(path)
+
+    if bench == "split":
+        from src.segmentation import clear_cache, sentence_spans
+
+        def run():
+            # Measure a real punkt pass, not a hit in the shared span cache
+            clear_cache()
+            sentence_spans(text, language=lang)
+
+        return run
+
+    transformer = StyleTransformer(model_name=BENCH_MODEL, lang=lang, client=LMStudioClient(base_url=base_url))
+
+    if bench == "chunking":
+        return lambda: transformer.split_into_chunks(text, styles)
+
+    if bench == "merge":
+        chunks, carried = transformer.split_into_chunks(text, styles)
+        return lambda: transformer.merge_chunks(chunks, carried)
+
+    if bench == "correction":
+        from src.text_preprocessing import TextPreprocessor
+        preprocessor = TextPreprocessor(lang=lang, llm=transformer)
+        return lambda: preprocessor.correct_text(text)
+
+    if bench == "readability":
+        from src.readability import get_readability_scores
+        return lambda: get_readability_scores(text, lang)
+
+    if bench == "pipeline":
+        from src.pipeline import run_pipeline
+        from src.metrics import PipelineMetrics
+
+        runs = []
+
+        def run():
+            metrics = PipelineMetrics(name=Path(path).stem)
+            run_pipeline(path, model_name=BENCH_MODEL, lang=lang, use_cache=False, base_url=base_url,
+                         metrics=metrics)
+            runs.append(metrics)
+
+        run.runs = runs
+        return run
+
+    raise ValueError(f"Unknown benchmark: {bench}")
+
+
+def run_case(case):
+    """Run one case in this process and return its result dict (called in the child interpreter)."""
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+
+    text = generate_corpus(case["lang"], case["size"])
+    path = Path(f"bench_{case['lang']}_{format_size(case['size'])}.txt")
+    path.write_text(text, encoding="utf-8")
+    size_bytes = len(text.encode("utf-8"))
+
+    run = build_case(case["bench"], case["lang"], text, str(path), case["url"])
+    # Untimed warm-up runs pay for imports, NLTK models and lexicon loading
+    for _ in range(case["warmup"] if case["bench"] != "pipeline" else 0):
+        run()
+    times = []
+    for _ in range(case["repeat"]):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    latencies = times
+    if case["bench"] == "pipeline":
+        # Per-chunk model latency is the interesting distribution for a full run
+        latencies = [
+            span["seconds"] for metrics in run.runs for span in metrics.to_dict()["spans"]
+            if span["stage"] == "transform_chunk"
+        ] or times
+
+    median = statistics.median(times)
+    return {
+        "bench": case["bench"],
+        "lang": case["lang"],
+        "size": case["size"],
+        "bytes": size_bytes,
+        "repeat": case["repeat"],
+        "median_s": median,
+        "p50_s": percentile(latencies, 50),
+        "p99_s": percentile(latencies, 99),
+        "throughput_mb_s": size_bytes / (1024 * 1024) / median if median else 0.0,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def run_case_subprocess(case, timeout):
+    """Run a case in a fresh interpreter inside a scratch directory, so outputs and RSS are isolated."""
+    with tempfile.TemporaryDirectory(prefix="style-bench-") as workdir:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), os.environ.get("PYTHONPATH", "")]))
+        try:
+            proc = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--run-case", json.dumps(case)],
+                cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return {**case, "skipped": f"timed out after {timeout}s"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+    return {**case, "skipped": error[:160]}
+
+
+def case_key(result):
+    return f"{result['bench']}/{result['lang']}/{format_size(result['size'])}"
+
+
+def compare(results, baseline, tolerance):
+    """Attach the change of each case's median against the baseline. Returns the regressed keys."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if "skipped" in result or not previous:
+            continue
+        change = result["median_s"] / previous["median_s"] - 1 if previous["median_s"] else 0.0
+        result["vs_baseline"] = change
+        if change > tolerance:
+            regressions.append(case_key(result))
+    return regressions
+
+
+def report_header():
+    header = f"{'case':<26} {'median':>9} {'p50':>9} {'p99':>9} {'MB/s':>9} {'RSS MB':>8} {'vs base':>8}"
+    return header + "\n" + "-" * len(header)
+
+
+def format_row(result):
+    key = case_key(result)
+    if "skipped" in result:
+        return f"{key:<26} skipped: {result['skipped']}"
+    rss = f"{result['peak_rss_mb']:.0f}" if result.get("peak_rss_mb") is not None else "n/a"
+    change = f"{result['vs_baseline']:+.1%}" if "vs_baseline" in result else ""
+    return (f"{key:<26} {result['median_s']:8.4f}s {result['p50_s']:8.4f}s {result['p99_s']:8.4f}s "
+            f"{result['throughput_mb_s']:9.2f} {rss:>8} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline and its stages.")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma-separated benchmarks to run")
+    parser.add_argument("--langs", default="en,tr", help="Comma-separated languages")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes, e.g. 1KB,1MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Iterations per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed iterations before each stage case")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake server delay per request")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Fake server delay per generated word")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Seconds before a case is abandoned")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 if a case regressed")
+    parser.add_argument("--output", help="Also write the results as JSON to this path")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print("RESULT " + json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    benchmarks = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    langs = [lang.strip() for lang in args.langs.split(",") if lang.strip()]
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+
+    server, url = start_server(latency_ms=args.latency_ms, token_ms=args.token_ms)
+    print(f"Fake LLM server at {url} (latency {args.latency_ms:.0f} ms + {args.token_ms:.1f} ms/word)\n")
+
+    print(report_header())
+    results = []
+    for bench in benchmarks:
+        for lang in langs:
+            for size in sizes:
+                case = {"bench": bench, "lang": lang, "size": size, "repeat": args.repeat, "warmup": args.warmup,
+                        "url": url}
+                result = run_case_subprocess(case, args.timeout)
+                result.pop("url", None)
+                results.append(result)
+                print(format_row(result))
+    server.shutdown()
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+
+    print("\nSummary" + (f" (baseline: {baseline_path})" if baseline else " (no baseline yet)"))
+    print(report_header())
+    for result in results:
+        print(format_row(result))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        measured = {case_key(result): result for result in results if "skipped" not in result}
+        baseline_path.write_text(json.dumps({**baseline, **measured}, indent=2), encoding="utf-8")
+        print(f"\nSaved {len(measured)} cases to {baseline_path}")
+    if regressions:
+        print(f"\nSlower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,49 @@
 import argparse
-from src.pipeline import run_pipeline
+import logging
+import sys
+from pathlib import Path
+from src.pipeline import BACKENDS, run_pipeline
+from src.llm_client import DEFAULT_BASE_URL
+from src.batch import collect_inputs, run_batch
+from src.metrics import serve_metrics
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run style transformation pipeline.")
-    parser.add_argument("input_path", type=str, help="Path to input text file")
+    parser.add_argument("input_path", type=str, help="Path to an input text file, or a directory / glob pattern for batch mode")
     parser.add_argument("--model", type=str, default="local-model", help="Model name for LM Studio or HuggingFace")
+    parser.add_argument("--backend", choices=BACKENDS, default="lm_studio",
+                        help="Run the model through LM Studio or load HuggingFace weights in-process")
     parser.add_argument("--lang", type=str, default="en", help="Language code: 'en' or 'tr'")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of chunk requests in flight at once")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk completion cache")
+    parser.add_argument("--base-url", type=str, default=DEFAULT_BASE_URL, help="LM Studio OpenAI-compatible API base URL")
+    parser.add_argument("--incremental", action="store_true", help="Only reprocess sentences and chunks changed since the last run")
+    parser.add_argument("--workers", type=int, default=1, help="Batch mode: number of documents processed in parallel")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process", help="Batch mode: worker pool type")
+    parser.add_argument("--lt-workers", type=int, default=0, help="Number of pooled LanguageTool servers (0 = one in-process instance)")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO", help="Logging verbosity")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus-style metrics at http://127.0.0.1:PORT/metrics")
 
     args = parser.parse_args()
-    outputs, scores = run_pipeline(args.input_path, model_name=args.model , lang=args.lang)
+    logging.basicConfig(level=args.log_level, format="[%(levelname)s] %(name)s: %(message)s")
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"Serving metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+
+    # Batch mode: a directory or glob pattern is processed with warm, reused workers
+    if not Path(args.input_path).is_file():
+        inputs = collect_inputs(args.input_path)
+        if not inputs:
+            sys.exit(f"No input files matched: {args.input_path}")
+        results = run_batch(inputs, model_name=args.model, lang=args.lang, workers=args.workers,
+                            executor=args.executor, max_concurrency=args.concurrency,
+                            use_cache=not args.no_cache, base_url=args.base_url,
+                            incremental=args.incremental, lt_workers=args.lt_workers, mode=args.backend)
+        sys.exit(0 if all(ok for _, ok, _, _ in results) else 1)
+
+    outputs, scores = run_pipeline(args.input_path, model_name=args.model , lang=args.lang, max_concurrency=args.concurrency, use_cache=not args.no_cache,
+                                   base_url=args.base_url, incremental=args.incremental, lt_workers=args.lt_workers,
+                                   mode=args.backend)
 
     print("\nTransformation completed. Readability scores:")
     for style, score in scores.items():
@@ -18,6 +53,18 @@ if __name__ == "__main__":
 
 
 
+# Batch mode: every .txt under a directory (or a glob), 4 worker processes
+
+# python main.py data/input_texts --model "LM Studio: TheBloke/phi-2-GGUF" --lang en --workers 4
+
+# python main.py "data/input_texts/*.txt" --model "LM Studio: TheBloke/phi-2-GGUF" --lang tr --workers 2 --executor thread
+
+
+# HuggingFace weights loaded in-process (shared across documents through the model registry)
+
+# python main.py data/input_texts/example.txt --model prithivida/parrot_paraphraser_on_T5 --backend hf --lang en
+
+
 # TheBloke/TinyLlama-1.1B-Chat-v1.0-GGUF
 
 # python main.py data/input_texts/example.txt --model "LM Studio: TheBloke/TinyLlama-1.1B-Chat-v1.0-GGUF" --lang en
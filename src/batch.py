@@ -0,0 +1,94 @@
+# src/batch.py
+import glob
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from src.llm_client import DEFAULT_BASE_URL
+
+# Warm components for the current worker (one set per process or per thread)
+_worker = threading.local()
+
+
+def collect_inputs(pattern):
+    """Expand a file, directory (all .txt files, recursively) or glob pattern into sorted paths."""
+    path = Path(pattern)
+    if path.is_dir():
+        return sorted(str(p) for p in path.rglob("*.txt"))
+    if path.is_file():
+        return [str(path)]
+    return sorted(p for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+
+
+def _init_worker(model_name, lang, max_concurrency, use_cache, base_url, lt_workers, mode):
+    # Imported here so process-pool workers pay the heavy imports once, at startup
+    from src.pipeline import build_components
+    _worker.transformer, _worker.preprocessor = build_components(
+        model_name, lang, max_concurrency, use_cache, base_url, lt_workers, mode
+    )
+
+
+def _process(path, settings, options):
+    from src.pipeline import run_pipeline
+
+    # Thread-pool workers have no initializer hook, so build components on first use
+    if getattr(_worker, "transformer", None) is None:
+        _init_worker(*settings)
+
+    start = time.perf_counter()
+    try:
+        run_pipeline(path, model_name=settings[0], lang=settings[1],
+                     transformer=_worker.transformer, preprocessor=_worker.preprocessor, **options)
+        return path, True, time.perf_counter() - start, None
+    except Exception as e:
+        return path, False, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def run_batch(paths, model_name="local-model", lang="en", workers=1, executor="process",
+              max_concurrency=4, use_cache=True, base_url=DEFAULT_BASE_URL, incremental=False, lt_workers=0,
+              mode="lm_studio"):
+    """
+    Run the pipeline over many documents. Each worker builds its transformer and preprocessor
+    once and reuses them for every document it handles.
+    `executor` is "process" (separate interpreters, separate LanguageTool JVMs) or "thread".
+    With `lt_workers` > 0, the workers of a process share one pool of that many LanguageTool servers.
+    `mode` is the StyleTransformer backend; "hf" workers load the weights once per process and
+    thread-pool workers share them through the model registry.
+    Returns a list of (path, ok, seconds, error) tuples in completion order.
+    """
+    settings = (model_name, lang, max_concurrency, use_cache, base_url, lt_workers, mode)
+    options = {"incremental": incremental}
+    total = len(paths)
+    results = []
+    started = time.perf_counter()
+    print(f"[Batch] {total} documents, {workers} {executor} worker(s)")
+
+    def report(result):
+        results.append(result)
+        path, ok, seconds, error = result
+        status = "OK" if ok else f"FAILED ({error})"
+        print(f"[Batch] [{len(results)}/{total}] {status} {path} ({seconds:.1f}s)")
+
+    if workers <= 1:
+        for path in paths:
+            report(_process(path, settings, options))
+    else:
+        if executor == "process":
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=settings)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        with pool:
+            futures = [pool.submit(_process, path, settings, options) for path in paths]
+            for future in as_completed(futures):
+                report(future.result())
+
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for _, ok, _, _ in results if ok)
+    rate = total / elapsed * 60 if elapsed else 0.0
+    print(f"\n[Batch] Done: {succeeded}/{total} succeeded, {total - succeeded} failed "
+          f"in {elapsed:.1f}s ({rate:.1f} docs/min)")
+    for path, ok, _, error in results:
+        if not ok:
+            print(f"[Batch]   {path}: {error}")
+    return results
@@ -0,0 +1,203 @@
+# src/chunking.py
+import hashlib
+import math
+import os
+import re
+import sys
+from functools import lru_cache
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Real BPE tokenizers split text into more pieces than estimate_tokens counts, most of all for
+# agglutinative Turkish, so estimates are scaled up per language before budgets are derived from them
+ESTIMATE_SCALES = {"en": 1.15, "tr": 1.6}
+DEFAULT_ESTIMATE_SCALE = 1.3
+
+
+def estimate_tokens(text):
+    """
+    Approximate BPE token count when no tokenizer is available locally:
+    every punctuation mark is one token and words cost one token per ~4 characters.
+    """
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=None)
+def scaled_estimator(lang="en"):
+    """estimate_tokens scaled by the language's ESTIMATE_SCALES factor."""
+    scale = ESTIMATE_SCALES.get(lang, DEFAULT_ESTIMATE_SCALE)
+
+    def count(text):
+        return math.ceil(estimate_tokens(text) * scale)
+    return count
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model_name, lang="en"):
+    """
+    Return a callable that counts tokens for `model_name`.
+    Uses the model's HuggingFace tokenizer if it is already available locally (never downloads),
+    and falls back to the scaled estimate for `lang` otherwise. Cached per model name and language.
+    transformers (and torch with it) is only used if something else already imported it, or if
+    HF_TOKEN_COUNTING=1 is set, so LM Studio runs do not pay for loading it.
+    """
+    if "transformers" not in sys.modules and os.environ.get("HF_TOKEN_COUNTING") != "1":
+        return scaled_estimator(lang)
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+    except Exception:
+        return scaled_estimator(lang)
+    return tokenizer_counter(tokenizer)
+
+
+def tokenizer_counter(tokenizer):
+    """Wrap a HuggingFace tokenizer into a token-counting callable."""
+    def count(text):
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return count
+
+
+def _split_long_sentence(sentence, max_tokens, count_tokens):
+    """Break a sentence that alone exceeds the budget into word runs that fit."""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for word in sentence.split():
+        word_tokens = count_tokens(word)
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def is_anchor_sentence(sentence, every=8):
+    """
+    Content-defined chunk boundary: roughly one sentence in `every` is an anchor,
+    decided by its own hash so the choice does not depend on the surrounding text.
+    """
+    digest = hashlib.blake2b(sentence.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big") % every == 0
+
+
+def chunk_sentences(sentences, max_tokens, count_tokens, overlap_sentences=1, boundary=None):
+    """
+    Pack whole sentences into chunks of at most `max_tokens` tokens.
+    Each chunk after the first repeats the last `overlap_sentences` sentences of the previous
+    one for context, as long as they take up no more than half of the budget.
+    If `boundary(sentence)` is given, a chunk that is at least half full is also closed after
+    any sentence it returns True for, which keeps chunk edges stable when other parts change.
+    Returns (chunks, carried): the chunk strings and, per chunk, how many sentences at its start
+    were carried over from the previous chunk (0 where the overlap was dropped).
+    """
+    max_tokens = max(1, max_tokens)
+    units = []
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            units.append((sentence, tokens))
+        else:
+            units.extend(
+                (piece, count_tokens(piece))
+                for piece in _split_long_sentence(sentence, max_tokens, count_tokens)
+            )
+
+    chunks = []
+    carried_counts = []
+    current = []
+    current_tokens = 0
+    fresh = 0  # sentences in `current` that were not carried over from the previous chunk
+
+    def close_chunk(next_tokens=0):
+        nonlocal current, current_tokens, fresh
+        chunks.append(" ".join(s for s, _ in current))
+        carried_counts.append(len(current) - fresh)
+        carried = current[-overlap_sentences:] if overlap_sentences > 0 else []
+        carried_tokens = sum(t for _, t in carried)
+        if carried_tokens > max_tokens // 2 or carried_tokens + next_tokens > max_tokens:
+            carried, carried_tokens = [], 0
+        current, current_tokens, fresh = list(carried), carried_tokens, 0
+
+    for unit in units:
+        if current_tokens + unit[1] > max_tokens:
+            if fresh:
+                close_chunk(unit[1])
+            else:
+                # Only carried-over context so far, and it leaves no room for this sentence
+                current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit[1]
+        fresh += 1
+
+        if boundary is not None and current_tokens >= max_tokens // 2 and boundary(unit[0]):
+            close_chunk()
+
+    if fresh:
+        chunks.append(" ".join(s for s, _ in current))
+        carried_counts.append(len(current) - fresh)
+    return chunks, carried_counts
+
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def sentence_shingles(sentence, k=2):
+    """Hashes of the overlapping k-word shingles of a sentence (case and punctuation ignored)."""
+    words = _WORD_PATTERN.findall(sentence.lower())
+    if len(words) <= k:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i:i + k])) for i in range(len(words) - k + 1)}
+
+
+def overlap_similarity(head, tail, k=2):
+    """
+    How closely a run of sentences restates another run, from 0 to 1: shared shingles over the
+    shingles of the larger run, so a short sentence that merely reuses a phrase scores low.
+    """
+    head_shingles = sentence_shingles(" ".join(head), k)
+    tail_shingles = sentence_shingles(" ".join(tail), k)
+    if not head_shingles or not tail_shingles:
+        return 0.0
+    return len(head_shingles & tail_shingles) / max(len(head_shingles), len(tail_shingles))
+
+
+def overlap_prefix_length(previous, sentences, max_overlap, k=2, threshold=0.5):
+    """
+    Number of leading `sentences` that restate the end of the previous chunk's sentences.
+    The first 1..`max_overlap` sentences are compared, in order, with the last 1..`max_overlap`
+    sentences of `previous` (a paraphrase may split or join the repeated sentences), and the
+    best-scoring run of at least `threshold` similarity is dropped.
+    """
+    best_drop, best_score = 0, threshold
+    for drop in range(1, min(max_overlap, len(sentences)) + 1):
+        for tail in range(1, min(max_overlap, len(previous)) + 1):
+            score = overlap_similarity(sentences[:drop], previous[-tail:], k)
+            if score > best_score or (score == best_score and best_drop == 0):
+                best_drop, best_score = drop, score
+    return best_drop
+
+
+def merge_sentence_chunks(chunk_sentences_list, max_overlap=2, k=2, threshold=0.5):
+    """
+    Merge consecutive chunks (each given as a list of sentences) by aligning the head of each
+    chunk against the tail of the previous one and dropping the overlapping sentences.
+    `max_overlap` should be the number of sentences carried between chunks plus a little slack
+    for paraphrasing; sentences further in, or repeated elsewhere in the text, are always kept.
+    It may also be a list with one limit per chunk, where 0 keeps that chunk's head as is.
+    """
+    if isinstance(max_overlap, int):
+        max_overlap = [max_overlap] * len(chunk_sentences_list)
+    merged = []
+    previous = []
+    for sentences, limit in zip(chunk_sentences_list, max_overlap):
+        drop = overlap_prefix_length(previous, sentences, limit, k, threshold) if previous else 0
+        merged.extend(sentences[drop:])
+        previous = sentences
+    return merged
@@ -0,0 +1,122 @@
+# src/completion_cache.py
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path("data/cache/completions.sqlite")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+
+
+def make_key(model_name, prompt, temperature, max_tokens):
+    """Content-addressed key for a completion request."""
+    payload = json.dumps([model_name, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    On-disk cache of LLM completions backed by SQLite.
+    Entries are keyed by a hash of (model_name, prompt, temperature, max_tokens) and evicted
+    least-recently-used first once the stored completions exceed `max_bytes`.
+    Set `bypass=True` to skip both lookups and writes without removing the cache file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, bypass=False):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Chunks are dispatched from worker threads, access is serialized through the lock.
+        # Batch workers in other processes share the file, so wait on their write locks.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " completion TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON completions (last_access)")
+        self._conn.commit()
+        # Running size of the stored completions, kept up to date by put() so a write does not scan
+        # the table; it is re-read from the file before evicting, since other processes write too
+        self._total = self._stored_bytes()
+
+    def get(self, model_name, prompt, temperature, max_tokens):
+        """Return the cached completion, or None on a miss (or when bypassed)."""
+        if self.bypass:
+            return None
+        key = make_key(model_name, prompt, temperature, max_tokens)
+        with self._lock:
+            row = self._conn.execute("SELECT completion FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, model_name, prompt, temperature, max_tokens, completion):
+        if self.bypass:
+            return
+        key = make_key(model_name, prompt, temperature, max_tokens)
+        size = len(completion.encode("utf-8"))
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, completion, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, completion, size, time.time())
+            )
+            self._total += size - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _stored_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def _evict(self):
+        total = self._stored_bytes()
+        self._total = total
+        if total <= self.max_bytes:
+            return
+        # Walk the oldest entries only as far as needed instead of loading the whole table
+        rows = self._conn.execute("SELECT key, size FROM completions ORDER BY last_access ASC")
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        rows.close()
+        self._conn.executemany("DELETE FROM completions WHERE key = ?", evicted)
+        self._total = total
+        logger.debug("Completion cache evicted %s entries.", len(evicted))
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self._total = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,193 +1,166 @@
 import plotly.graph_objects as go
 import plotly.offline as pyo
 import networkx as nx
+from functools import lru_cache
 from pathlib import Path
+import html
 import math
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+STYLES = ['academic', 'simple', 'children']
+
+# Nodes that show pipeline results take their preview from the current document;
+# the others always show the same description.
+NODES = {
+    'input_text': {
+        'label': 'Input Text File\n(__INPUT_NAME__)',
+        'color': '#3498db',
+        'size': 25,
+        'pos': (0, 4)
+    },
+    'preprocessor': {
+        'label': 'Text Preprocessor\n(Grammar Check)',
+        'color': '#e74c3c',
+        'size': 20,
+        'pos': (2, 4),
+        'preview': 'Analyzes text for grammar errors using LanguageTool/llm'
+    },
+    'corrections_json': {
+        'label': 'Corrections JSON\n(Grammar Errors)',
+        'color': '#f39c12',
+        'size': 15,
+        'pos': (4, 5)
+    },
+    'corrected_text': {
+        'label': 'Corrected Text',
+        'color': '#2ecc71',
+        'size': 20,
+        'pos': (4, 3)
+    },
+    'style_transformer': {
+        'label': 'Style Transformer',
+        'color': '#9b59b6',
+        'size': 20,
+        'pos': (6, 3),
+        'preview': 'Transforms text into different writing styles using AI model'
+    },
+    'academic_style': {
+        'label': 'Academic Style\n(.txt file)',
+        'color': '#34495e',
+        'size': 15,
+        'pos': (8, 4.5)
+    },
+    'simple_style': {
+        'label': 'Simple Style\n(.txt file)',
+        'color': '#34495e',
+        'size': 15,
+        'pos': (8, 3)
+    },
+    'children_style': {
+        'label': 'Child-Friendly Style\n(.txt file)',
+        'color': '#34495e',
+        'size': 15,
+        'pos': (8, 1.5)
+    },
+    'readability_analyzer': {
+        'label': 'Readability Analyzer',
+        'color': '#16a085',
+        'size': 20,
+        'pos': (10, 3),
+        'preview': 'Calculates Flesch Reading Ease, FKGL, and other readability metrics'
+    },
+    'readability_scores': {
+        'label': 'Readability Scores\n(.json file)',
+        'color': '#f39c12',
+        'size': 15,
+        'pos': (12, 3)
+    }
+}
+
+# Connections between nodes
+EDGES = [
+    ('input_text', 'preprocessor'),
+    ('preprocessor', 'corrections_json'),
+    ('preprocessor', 'corrected_text'),
+    ('corrected_text', 'style_transformer'),
+    ('style_transformer', 'academic_style'),
+    ('style_transformer', 'simple_style'),
+    ('style_transformer', 'children_style'),
+    ('academic_style', 'readability_analyzer'),
+    ('simple_style', 'readability_analyzer'),
+    ('children_style', 'readability_analyzer'),
+    ('readability_analyzer', 'readability_scores')
+]
+
+
+def truncate_text(text, max_length=100):
+    """Helper function to truncate text for preview"""
+    if len(text) <= max_length:
+        return text
+    return text[:max_length] + "..."
+
+
+def build_previews(input_text=None, corrections=None, corrected_text=None, outputs=None, scores=None):
+    """Preview text for every node, from the pipeline results held in memory."""
+    previews = {node_id: props['preview'] for node_id, props in NODES.items() if 'preview' in props}
+    previews['input_text'] = truncate_text(input_text) if input_text else "Input text file"
 
-def create_diagram(input_path):
-    """
-    Create a visual diagram of the text processing pipeline using Plotly and NetworkX.
-    Includes content previews at each stage.
-    Saves the diagram as an HTML file in the output directory.
-    """
-    
-    # Read the input file and generated outputs
-    base = Path(input_path).stem
-    out_dir = Path("data/outputs")
-    
-    # Helper function to truncate text for preview
-    def truncate_text(text, max_length=100):
-        if len(text) <= max_length:
-            return text
-        return text[:max_length] + "..."
-    
-    # Read input text
-    try:
-        input_text = Path(input_path).read_text(encoding="utf-8")
-        input_preview = truncate_text(input_text)
-    except:
-        input_preview = "Input text file"
-    
-    # Read corrections if available
     corrections_preview = "No corrections found"
-    try:
-        corrections_file = out_dir / f"{base}_corrections.json"
-        if corrections_file.exists():
-            with open(corrections_file, 'r', encoding='utf-8') as f:
-                corrections = json.load(f)
-            if corrections:
-                corrections_preview = f"Found {len(corrections)} corrections"
-                if len(corrections) > 0:
-                    first_correction = corrections[0]
-                    corrections_preview += f"\nExample: '{first_correction.get('original', '')}' → '{first_correction.get('corrected', '')}'"
-    except:
-        pass
-
-    # Read corrected text preview (NEW)
-    corrected_preview = "Corrected text file"
-    try:
-        corrected_file = out_dir / f"{base}_corrected.txt"
-        if corrected_file.exists():
-            corrected_text = corrected_file.read_text(encoding='utf-8')
-            corrected_preview = truncate_text(corrected_text)
-    except:
-        pass
-    
-    # Read style outputs
-    style_previews = {}
-    styles = ['academic', 'simple', 'children']
-    for style in styles:
-        try:
-            style_file = out_dir / f"{base}_{style}.txt"
-            if style_file.exists():
-                style_text = style_file.read_text(encoding='utf-8')
-                style_previews[style] = truncate_text(style_text)
-            else:
-                style_previews[style] = f"{style.title()} style output"
-        except:
-            style_previews[style] = f"{style.title()} style output"
-    
-    # Read readability scores
+    if corrections:
+        first_correction = corrections[0]
+        corrections_preview = f"Found {len(corrections)} corrections"
+        corrections_preview += f"\nExample: '{first_correction.get('original', '')}' → '{first_correction.get('corrected', '')}'"
+    previews['corrections_json'] = corrections_preview
+
+    previews['corrected_text'] = truncate_text(corrected_text) if corrected_text else "Corrected text file"
+
+    outputs = outputs or {}
+    for style in STYLES:
+        if outputs.get(style):
+            previews[f'{style}_style'] = truncate_text(outputs[style])
+        else:
+            previews[f'{style}_style'] = f"{style.title()} style output"
+
     readability_preview = "Readability scores"
-    try:
-        readability_file = out_dir / f"{base}_readability.json"
-        if readability_file.exists():
-            with open(readability_file, 'r', encoding='utf-8') as f:
-                scores = json.load(f)
-            readability_preview = "Readability Scores:\n"
-            for style, score_data in scores.items():
-                if isinstance(score_data, dict) and 'flesch_reading_ease' in score_data:
-                    readability_preview += f"{style.title()}: {score_data['flesch_reading_ease']:.1f}\n"
-    except:
-        pass
-    
+    if scores:
+        readability_preview = "Readability Scores:\n"
+        for style, score_data in scores.items():
+            if isinstance(score_data, dict) and 'flesch_reading_ease' in score_data:
+                readability_preview += f"{style.title()}: {score_data['flesch_reading_ease']:.1f}\n"
+            elif isinstance(score_data, dict) and 'atesman_score' in score_data:
+                readability_preview += f"{style.title()}: {score_data['atesman_score']:.1f} (Ateşman)\n"
+    previews['readability_scores'] = readability_preview
+    return previews
+
+
+def _hover_placeholder(node_id):
+    return f"__HOVER_{node_id}__"
+
+
+@lru_cache(maxsize=1)
+def diagram_template():
+    """
+    Build the diagram page once. Everything except the input file name and the node previews
+    is the same for every document, so the Plotly figure and HTML are generated a single time
+    with placeholders that render_diagram fills in.
+    """
+    nodes = NODES
+
     # Create a directed graph
     G = nx.DiGraph()
     
-    # Define nodes with their properties and previews
-    nodes = {
-        'input_text': {
-            'label': f'Input Text File\n({Path(input_path).name})',
-            'color': '#3498db',
-            'size': 25,
-            'pos': (0, 4),
-            'preview': input_preview
-        },
-        'preprocessor': {
-            'label': 'Text Preprocessor\n(Grammar Check)',
-            'color': '#e74c3c',
-            'size': 20,
-            'pos': (2, 4),
-            'preview': 'Analyzes text for grammar errors using LanguageTool/llm'
-        },
-        'corrections_json': {
-            'label': 'Corrections JSON\n(Grammar Errors)',
-            'color': '#f39c12',
-            'size': 15,
-            'pos': (4, 5),
-            'preview': corrections_preview
-        },
-        'corrected_text': {
-            'label': 'Corrected Text',
-            'color': '#2ecc71',
-            'size': 20,
-            'pos': (4, 3),
-            'preview': corrected_preview
-        },
-        'style_transformer': {
-            'label': 'Style Transformer',
-            'color': '#9b59b6',
-            'size': 20,
-            'pos': (6, 3),
-            'preview': 'Transforms text into different writing styles using AI model'
-        },
-        'academic_style': {
-            'label': 'Academic Style\n(.txt file)',
-            'color': '#34495e',
-            'size': 15,
-            'pos': (8, 4.5),
-            'preview': style_previews['academic']
-        },
-        'simple_style': {
-            'label': 'Simple Style\n(.txt file)',
-            'color': '#34495e',
-            'size': 15,
-            'pos': (8, 3),
-            'preview': style_previews['simple']
-        },
-        'children_style': {
-            'label': 'Child-Friendly Style\n(.txt file)',
-            'color': '#34495e',
-            'size': 15,
-            'pos': (8, 1.5),
-            'preview': style_previews['children']
-        },
-        'readability_analyzer': {
-            'label': 'Readability Analyzer',
-            'color': '#16a085',
-            'size': 20,
-            'pos': (10, 3),
-            'preview': 'Calculates Flesch Reading Ease, FKGL, and other readability metrics'
-        },
-        'readability_scores': {
-            'label': 'Readability Scores\n(.json file)',
-            'color': '#f39c12',
-            'size': 15,
-            'pos': (12, 3),
-            'preview': readability_preview
-        }
-    }
-    
     # Add nodes to graph
     for node_id, props in nodes.items():
         G.add_node(node_id, **props)
     
-    # Define edges (connections between nodes)
-    edges = [
-        ('input_text', 'preprocessor'),
-        ('preprocessor', 'corrections_json'),
-        ('preprocessor', 'corrected_text'),
-        ('corrected_text', 'style_transformer'),
-        ('style_transformer', 'academic_style'),
-        ('style_transformer', 'simple_style'),
-        ('style_transformer', 'children_style'),
-        ('academic_style', 'readability_analyzer'),
-        ('simple_style', 'readability_analyzer'),
-        ('children_style', 'readability_analyzer'),
-        ('readability_analyzer', 'readability_scores')
-    ]
-    
     # Add edges to graph
-    G.add_edges_from(edges)
+    G.add_edges_from(EDGES)
     
-    # Create hover text with previews
-    hover_texts = []
-    for node in G.nodes():
-        node_data = nodes[node]
-        hover_text = f"<b>{node_data['label']}</b><br><br>"
-        hover_text += f"<i>Preview:</i><br>{node_data['preview']}"
-        hover_texts.append(hover_text)
+    # Hover texts are filled in per document by render_diagram
+    hover_texts = [_hover_placeholder(node) for node in G.nodes()]
     
     # Extract node positions and properties for Plotly
     node_trace = go.Scatter(
@@ -312,12 +285,6 @@ def create_diagram(input_path):
         )
     )
     
-    # Create output directory
-    out_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Save the diagram as HTML
-    output_file = out_dir / f"{base}_pipeline_diagram.html"
-    
     # Generate the full HTML with Plotly
     fig_html = fig.to_html(include_plotlyjs='cdn')
     
@@ -377,7 +344,7 @@ def create_diagram(input_path):
     custom_header = f'''
     <div class="header">
         <h1>📊 Text Processing Pipeline Visualization</h1>
-        <p>File: {Path(input_path).name} | Interactive Flow Diagram with Content Previews</p>
+        <p>File: __INPUT_NAME__ | Interactive Flow Diagram with Content Previews</p>
     </div>
     
     <div class="info-box">
@@ -404,15 +371,82 @@ def create_diagram(input_path):
     final_html = fig_html.replace('<head>', f'<head>{custom_css}')
     final_html = final_html.replace('<body>', f'<body>{custom_header}')
     
-    # Save the enhanced HTML
+    return final_html
+
+
+def render_diagram(input_name, previews):
+    """Fill the cached diagram template with one document's file name and node previews."""
+    page = diagram_template()
+    for node_id, props in NODES.items():
+        label = props['label'].replace('__INPUT_NAME__', input_name)
+        hover_text = f"<b>{label}</b><br><br>"
+        hover_text += f"<i>Preview:</i><br>{previews.get(node_id, '')}"
+        # Escape "</" so a preview can never close the surrounding <script> tag
+        page = page.replace(json.dumps(_hover_placeholder(node_id)), json.dumps(hover_text).replace("</", "<\\/"))
+    input_label = NODES['input_text']['label']
+    page = page.replace(json.dumps(input_label), json.dumps(input_label.replace('__INPUT_NAME__', input_name)))
+    return page.replace('__INPUT_NAME__', html.escape(input_name))
+
+
+def save_diagram(input_path, page, out_dir="data/outputs"):
+    """Save a rendered diagram page as `<name>_pipeline_diagram.html` and return its path."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    output_file = out_dir / f"{Path(input_path).stem}_pipeline_diagram.html"
+
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(final_html)
-    
-    print(f"📊 Interactive pipeline diagram with previews saved to: {output_file}")
-    print("💡 Open the HTML file in your browser and hover over nodes to see content previews!")
-    
+        f.write(page)
+
+    logger.info("📊 Interactive pipeline diagram with previews saved to: %s", output_file)
+    logger.info("💡 Open the HTML file in your browser and hover over nodes to see content previews!")
+
     return str(output_file)
 
+
+def create_diagram_from_results(input_path, input_text=None, corrections=None, corrected_text=None,
+                                outputs=None, scores=None, out_dir="data/outputs"):
+    """
+    Create the pipeline diagram from results the pipeline already holds in memory
+    and save it as `<name>_pipeline_diagram.html` in the output directory.
+    """
+    previews = build_previews(input_text, corrections, corrected_text, outputs, scores)
+    return save_diagram(input_path, render_diagram(Path(input_path).name, previews), out_dir)
+
+
+def create_diagram(input_path):
+    """
+    Create a visual diagram of the text processing pipeline using Plotly and NetworkX.
+    Includes content previews at each stage.
+    Reads the results back from the output directory; the pipeline itself calls
+    create_diagram_from_results with the results it already has.
+    """
+    base = Path(input_path).stem
+    out_dir = Path("data/outputs")
+
+    def read_text(path):
+        try:
+            return Path(path).read_text(encoding="utf-8")
+        except:
+            return None
+
+    def read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return None
+
+    outputs = {style: read_text(out_dir / f"{base}_{style}.txt") for style in STYLES}
+    return create_diagram_from_results(
+        input_path,
+        input_text=read_text(input_path),
+        corrections=read_json(out_dir / f"{base}_corrections.json"),
+        corrected_text=read_text(out_dir / f"{base}_corrected.txt"),
+        outputs=outputs,
+        scores=read_json(out_dir / f"{base}_readability.json"),
+        out_dir=out_dir
+    )
+
 if __name__ == "__main__":
     # Example usage
     create_diagram("data/input_texts/example.txt")
\ No newline at end of file
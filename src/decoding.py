@@ -0,0 +1,79 @@
+# src/decoding.py
+import codecs
+import logging
+import mmap
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bytes inspected when the input is not valid UTF-8 and its encoding has to be guessed
+SAMPLE_BYTES = 64 * 1024
+# Files at least this large are memory-mapped instead of read into a bytes object first
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+# Checked longest first so UTF-32 LE is not mistaken for UTF-16 LE
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_encoding(sample):
+    """
+    Guess the encoding of a byte sample (a prefix of the document).
+    BOMs and valid UTF-8 are recognised directly; anything else goes to chardet.
+    """
+    sample = bytes(sample)
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    try:
+        # final=False: the sample may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    import chardet
+    return chardet.detect(sample)["encoding"] or "utf-8"
+
+
+def decode_bytes(data, sample_size=SAMPLE_BYTES):
+    """
+    Decode a document's bytes (bytes, memoryview or mmap) and return (text, encoding).
+    Valid UTF-8 is decoded in one pass without any detection; otherwise the encoding is
+    detected from the first `sample_size` bytes only, not the whole file.
+    """
+    for bom, encoding in BOMS:
+        if data[:len(bom)] == bom:
+            return str(data, encoding, errors="replace"), encoding
+
+    try:
+        return str(data, "utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    encoding = detect_encoding(data[:sample_size])
+    try:
+        return str(data, encoding), encoding
+    except (UnicodeDecodeError, LookupError):
+        # The sample was not representative; keep going rather than fail
+        logger.warning("Input is not valid %s, decoding as UTF-8 with replacements", encoding)
+        return str(data, "utf-8", errors="replace"), "utf-8"
+
+
+def read_text(path, sample_size=SAMPLE_BYTES, mmap_threshold=MMAP_THRESHOLD):
+    """Read and decode a text file, memory-mapping it when it is large. Returns (text, encoding)."""
+    path = Path(path)
+    size = path.stat().st_size
+    if size == 0:
+        return "", "utf-8"
+    if size < mmap_threshold:
+        return decode_bytes(path.read_bytes(), sample_size)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return decode_bytes(mapped, sample_size)
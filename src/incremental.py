@@ -0,0 +1,93 @@
+# src/incremental.py
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_VERSION = 1
+
+
+def fingerprint(text):
+    """Short, stable content hash of a sentence or chunk."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:20]
+
+
+class FingerprintStore:
+    """
+    Per-document record of what the last run produced, saved next to the outputs as
+    `<name>_fingerprints.json`. Corrected sentences are keyed by the original sentence's
+    fingerprint and transformed chunks by (style, chunk fingerprint), so a re-run only has to
+    process sentences and chunks it has not seen before. The store is discarded when the model
+    or language changes.
+    """
+
+    def __init__(self, path, model_name, lang):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.lang = lang
+        self.sentences = {}
+        self.chunks = {}
+        self.reused_sentences = 0
+        self.reused_chunks = 0
+
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable fingerprint file %s: %s", self.path, e)
+                data = {}
+            if (data.get("version") == FINGERPRINT_VERSION and data.get("model") == model_name
+                    and data.get("lang") == lang):
+                self.sentences = data.get("sentences", {})
+                self.chunks = data.get("chunks", {})
+
+    @classmethod
+    def for_input(cls, input_path, out_dir, model_name, lang):
+        return cls(Path(out_dir) / f"{Path(input_path).stem}_fingerprints.json", model_name, lang)
+
+    def lookup_sentences(self, sentences):
+        """Return {index: (corrected, num_issues)} for sentences corrected in a previous run."""
+        known = {}
+        for idx, sentence in enumerate(sentences):
+            entry = self.sentences.get(fingerprint(sentence))
+            if entry is not None:
+                known[idx] = (entry["corrected"], entry.get("num_issues"))
+        self.reused_sentences = len(known)
+        return known
+
+    def lookup_chunks(self, chunks, styles):
+        """Return {(style, index): output} for chunks transformed in a previous run."""
+        known = {}
+        for idx, chunk in enumerate(chunks):
+            chunk_fp = fingerprint(chunk)
+            for style in styles:
+                output = self.chunks.get(style, {}).get(chunk_fp)
+                if output is not None:
+                    known[(style, idx)] = output
+        self.reused_chunks = len(known)
+        return known
+
+    def update(self, sentences, corrected_sentences, issue_counts, chunks, chunk_outputs):
+        """Replace the stored fingerprints with the ones from the current run."""
+        self.sentences = {
+            fingerprint(original): {"corrected": corrected, "num_issues": num_issues}
+            for original, corrected, num_issues in zip(sentences, corrected_sentences, issue_counts)
+        }
+        chunk_fps = [fingerprint(chunk) for chunk in chunks]
+        self.chunks = {
+            style: dict(zip(chunk_fps, outputs))
+            for style, outputs in chunk_outputs.items()
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": FINGERPRINT_VERSION,
+            "model": self.model_name,
+            "lang": self.lang,
+            "sentences": self.sentences,
+            "chunks": self.chunks
+        }
+        self.path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
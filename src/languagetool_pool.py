@@ -0,0 +1,142 @@
+# src/languagetool_pool.py
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated URLs of LanguageTool servers managed outside this process
+# (e.g. "http://localhost:8081,http://localhost:8082"); used instead of starting local ones
+REMOTE_SERVERS_ENV = "LANGUAGETOOL_SERVERS"
+
+HEALTH_CHECK_TEXT = "This is a test."
+
+
+def remote_servers_from_env():
+    return [url.strip() for url in os.environ.get(REMOTE_SERVERS_ENV, "").split(",") if url.strip()]
+
+
+def start_server(language, remote_server=None):
+    """Start a local LanguageTool server (its own JVM), or connect to a running one."""
+    import language_tool_python
+
+    if remote_server:
+        return language_tool_python.LanguageTool(language, remote_server=remote_server)
+    return language_tool_python.LanguageTool(language)
+
+
+class LanguageToolPool:
+    """
+    A fixed set of long-lived LanguageTool servers for one language.
+    Each check borrows an idle server, so up to `workers` texts are checked at once and the JVMs
+    spread the work across cores. A server whose check fails is health-checked and restarted.
+    """
+
+    def __init__(self, language="en-US", workers=2, remote_servers=None):
+        self.language = language
+        self.remote_servers = list(remote_servers or [])
+        self.workers = len(self.remote_servers) or max(1, workers)
+        self.closed = False
+        self._servers = [None] * self.workers
+        self._idle = Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        # JVM startup dominates, so the servers are started side by side
+        list(self._executor.map(self._start, range(self.workers)))
+        for slot in range(self.workers):
+            self._idle.put(slot)
+
+    def _start(self, slot):
+        remote = self.remote_servers[slot] if self.remote_servers else None
+        logger.debug("Starting LanguageTool server %s/%s (%s)...", slot + 1, self.workers, remote or 'local')
+        self._servers[slot] = start_server(self.language, remote)
+
+    def _restart(self, slot):
+        try:
+            self._servers[slot].close()
+        except Exception:
+            pass
+        self._start(slot)
+
+    def healthy(self, slot):
+        """True if the server in `slot` answers a trivial check."""
+        try:
+            self._servers[slot].check(HEALTH_CHECK_TEXT)
+            return True
+        except Exception:
+            return False
+
+    def health(self):
+        """Health of every server, by slot. Busy servers are checked too; requests are independent."""
+        return [self.healthy(slot) for slot in range(self.workers)]
+
+    def check(self, text):
+        """Check one text on the next idle server and return its matches."""
+        slot = self._idle.get()
+        try:
+            try:
+                return self._servers[slot].check(text)
+            except Exception as e:
+                # A healthy server means the text itself was the problem
+                if self.healthy(slot):
+                    raise
+                logger.warning("LanguageTool server %s is not responding (%s), restarting it...", slot + 1, e)
+                self._restart(slot)
+                return self._servers[slot].check(text)
+        finally:
+            self._idle.put(slot)
+
+    def check_many(self, texts):
+        """
+        Check many texts concurrently across the servers.
+        Returns one result per text, in order: its matches, or the exception its check raised.
+        """
+        def check_or_error(text):
+            try:
+                return self.check(text)
+            except Exception as e:
+                return e
+
+        return list(self._executor.map(check_or_error, texts))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._executor.shutdown(wait=True)
+        for server in self._servers:
+            if server is None:
+                continue
+            try:
+                server.close()
+            except Exception as e:
+                logger.warning("Failed to close LanguageTool: %s", e)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(language="en-US", workers=2):
+    """
+    Process-wide pool for a language, started on first use and kept until the interpreter exits,
+    so every TextPreprocessor (documents, batch threads, Streamlit reruns) shares the same servers.
+    """
+    key = (language, workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.closed:
+            pool = LanguageToolPool(language, workers, remote_servers_from_env())
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
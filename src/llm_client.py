@@ -0,0 +1,193 @@
+# src/llm_client.py
+import json
+import logging
+import os
+import time
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = os.environ.get("LM_STUDIO_BASE_URL", "http://localhost:1234/v1")
+
+
+class LLMError(Exception):
+    """Base class for failures talking to the completion server."""
+
+
+class LLMConnectionError(LLMError):
+    """The server could not be reached or did not answer in time."""
+
+
+class LLMResponseError(LLMError):
+    """The server answered with an error status or an unexpected body."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def iter_stream_lines(response):
+    """
+    Yield each line of a streamed response (as bytes, without the line break) as soon as it
+    arrives. requests' iter_lines() waits for a full read buffer, which would hold tokens back.
+    As in the SSE spec, an unterminated line at the end of the body was cut off and is dropped.
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        # urllib3 < 2 has no read1; byte-sized reads still deliver lines without delay
+        yield from response.iter_lines(chunk_size=1)
+        return
+    buffer = b""
+    while True:
+        data = read1(8192, decode_content=True)
+        if not data:
+            break
+        *lines, buffer = (buffer + data).split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        logger.debug("Dropping an unterminated stream line: %r", buffer[:200])
+
+
+class LMStudioClient:
+    """
+    Pooled HTTP client for LM Studio's OpenAI-compatible API.
+    One requests.Session keeps connections alive across chunks. Connection errors, timeouts and
+    5xx responses are retried with exponential backoff (`backoff * 2**attempt` seconds) before a
+    typed LLMError is raised.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, max_connections=8, connect_timeout=5.0,
+                 read_timeout=300.0, max_retries=3, backoff=0.5):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def send(self, path, payload, stream=False):
+        """
+        POST a JSON payload with retries and return the successful requests.Response.
+        With `stream`, the body is left unread so it can be consumed incrementally.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            retry_in = self.backoff * (2 ** attempt)
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise LLMConnectionError(f"Could not reach {url}: {e}") from e
+                logger.warning("%s unreachable (%s), retrying in %.1fs...", url, e, retry_in)
+                time.sleep(retry_in)
+                continue
+
+            if response.status_code >= 500 and attempt < self.max_retries:
+                logger.warning("%s returned %s, retrying in %.1fs...", url, response.status_code, retry_in)
+                response.close()
+                time.sleep(retry_in)
+                continue
+            if response.status_code >= 400:
+                raise LLMResponseError(
+                    f"{url} returned {response.status_code}: {response.text[:200]}",
+                    status_code=response.status_code
+                )
+            return response
+
+    def post(self, path, payload):
+        """POST a JSON payload with retries and return the decoded JSON response."""
+        response = self.send(path, payload)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise LLMResponseError(f"{response.url} returned invalid JSON: {e}", response.status_code) from e
+
+    def chat(self, model, prompt, temperature=0.7, max_tokens=512, stop=None):
+        """Run a single-message chat completion and return the reply text."""
+        return self.chat_completion(model, prompt, temperature, max_tokens, stop)[0]
+
+    def chat_payload(self, model, prompt, temperature, max_tokens, stop=None):
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if stop:
+            payload["stop"] = list(stop)
+        return payload
+
+    def chat_completion(self, model, prompt, temperature=0.7, max_tokens=512, stop=None):
+        """
+        Run a single-message chat completion and return (reply text, usage), where usage is the
+        server's token accounting ({"prompt_tokens", "completion_tokens", ...}) or {} if absent,
+        plus the reply's "finish_reason" ("length" when it hit max_tokens) if the server sent one.
+        Generation ends early at any of the `stop` sequences.
+        """
+        payload = self.chat_payload(model, prompt, temperature, max_tokens, stop)
+        data = self.post("chat/completions", payload)
+        try:
+            choice = data["choices"][0]
+            content = choice["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise LLMResponseError(f"Unexpected completion body: {str(data)[:200]}") from e
+        usage = dict(data.get("usage") or {})
+        if choice.get("finish_reason"):
+            usage["finish_reason"] = choice["finish_reason"]
+        return content, usage
+
+    def stream_chat(self, model, prompt, temperature=0.7, max_tokens=512, usage=None, stop=None):
+        """
+        Run a single-message chat completion with `stream: true` and yield the reply text piece
+        by piece as the server-sent events arrive. If a `usage` dict is passed, it is filled with
+        the server's token accounting and finish_reason once the stream ends, as in chat_completion.
+        Only connecting is retried; a stream that breaks off, or ends before the server reports a
+        finish reason or [DONE], raises LLMConnectionError.
+        """
+        payload = self.chat_payload(model, prompt, temperature, max_tokens, stop)
+        payload.update({"stream": True, "stream_options": {"include_usage": True}})
+        response = self.send("chat/completions", payload, stream=True)
+        finished = False
+        try:
+            for line in iter_stream_lines(response):
+                # SSE: "data: <json>" lines separated by blank lines; comments and other fields are skipped
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:"):].strip()
+                if data == b"[DONE]":
+                    finished = True
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError as e:
+                    raise LLMResponseError(f"Invalid stream event: {data[:200]!r}") from e
+                if "error" in event:
+                    raise LLMResponseError(f"Stream error: {str(event['error'])[:200]}")
+                if usage is not None and event.get("usage"):
+                    usage.update(event["usage"])
+                for choice in event.get("choices") or []:
+                    piece = (choice.get("delta") or {}).get("content")
+                    if piece:
+                        yield piece
+                    if choice.get("finish_reason"):
+                        finished = True
+                        if usage is not None:
+                            usage["finish_reason"] = choice["finish_reason"]
+        except (requests.RequestException, urllib3.exceptions.HTTPError, OSError) as e:
+            # iter_stream_lines reads through urllib3 directly, so its errors are not wrapped by requests
+            raise LLMConnectionError(f"Stream from {response.url} broke off: {e}") from e
+        finally:
+            response.close()
+        if not finished:
+            raise LLMConnectionError(f"Stream from {response.url} ended before the reply was finished")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,167 @@
+# src/metrics.py
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+METRIC_PREFIX = "style_pipeline"
+
+
+class PipelineMetrics:
+    """
+    Stage timings and counters for one pipeline run.
+    Every timed stage is kept as a span (start offset, duration, thread and attributes) for the
+    JSON trace and also summed per stage name. Safe to use from the transformer's worker threads.
+    """
+
+    def __init__(self, name=""):
+        self.name = name
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self.stages = {}  # stage -> {"count", "total_seconds", "max_seconds"}
+        self.counters = {}
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        """Time the body of a with-block as one span of `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, **attrs)
+
+    def record(self, name, start, seconds, **attrs):
+        """Add a span that started at perf_counter() value `start` and lasted `seconds`."""
+        span = {
+            "stage": name,
+            "start": round(start - self._origin, 6),
+            "seconds": round(seconds, 6),
+            "thread": threading.current_thread().name
+        }
+        span.update(attrs)
+        with self._lock:
+            stats = self.stages.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stats["count"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            self.spans.append(span)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "started_at": self.started_at,
+                "seconds": round(time.perf_counter() - self._origin, 6),
+                "stages": {name: dict(stats) for name, stats in self.stages.items()},
+                "counters": dict(self.counters),
+                "spans": list(self.spans)
+            }
+
+    def write_trace(self, path):
+        """Save the run as a JSON trace."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return str(path)
+
+    def summary(self):
+        """One line per stage, slowest first, for the log."""
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1]["total_seconds"], reverse=True)
+            return [
+                f"{name:<18} {stats['total_seconds']:8.3f}s  x{stats['count']:<5} max {stats['max_seconds']:.3f}s"
+                for name, stats in stages
+            ]
+
+
+class NullMetrics:
+    """Stand-in used when nobody is collecting metrics; every call is a no-op."""
+
+    def stage(self, name, **attrs):
+        return nullcontext()
+
+    def record(self, name, start, seconds, **attrs):
+        pass
+
+    def incr(self, name, value=1):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MetricsCollector:
+    """Totals across every run in the process, exposed in the Prometheus text format."""
+
+    def __init__(self):
+        self.runs = 0
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add(self, metrics):
+        data = metrics.to_dict()
+        with self._lock:
+            self.runs += 1
+            for name, stats in data["stages"].items():
+                total = self.stages.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+                total["count"] += stats["count"]
+                total["total_seconds"] += stats["total_seconds"]
+                total["max_seconds"] = max(total["max_seconds"], stats["max_seconds"])
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def prometheus_text(self):
+        with self._lock:
+            lines = [
+                f"# TYPE {METRIC_PREFIX}_runs_total counter",
+                f"{METRIC_PREFIX}_runs_total {self.runs}",
+                f"# TYPE {METRIC_PREFIX}_stage_seconds_total counter",
+            ]
+            lines += [f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {stats["total_seconds"]:.6f}'
+                      for name, stats in self.stages.items()]
+            lines.append(f"# TYPE {METRIC_PREFIX}_stage_calls_total counter")
+            lines += [f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {stats["count"]}'
+                      for name, stats in self.stages.items()]
+            lines.append(f"# TYPE {METRIC_PREFIX}_stage_seconds_max gauge")
+            lines += [f'{METRIC_PREFIX}_stage_seconds_max{{stage="{name}"}} {stats["max_seconds"]:.6f}'
+                      for name, stats in self.stages.items()]
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+                lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+            return "\n".join(lines) + "\n"
+
+
+# Shared by every run in the process
+collector = MetricsCollector()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve the collector's totals at http://host:port/metrics from a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = collector.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,83 @@
+# src/model_registry.py
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Process-wide store of loaded HuggingFace models keyed by (model_name, dtype, device).
+    Each acquire() increments a reference count and release() decrements it. Models without
+    references stay resident for reuse until more than `max_resident` models are loaded,
+    at which point the least recently used unreferenced ones are dropped.
+    """
+
+    def __init__(self, max_resident=2):
+        self.max_resident = max_resident
+        self._entries = OrderedDict()  # key -> {"tokenizer", "model", "refs"}
+        self._lock = threading.Lock()
+
+    def acquire(self, model_name, dtype=None, device="cpu"):
+        """Return (tokenizer, model) for the key, loading the weights only on first use."""
+        key = (model_name, str(dtype) if dtype is not None else None, device)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                logger.debug("Loading HuggingFace model '%s' (dtype=%s, device=%s)...", model_name, dtype, device)
+                tokenizer, model = load_hf_model(model_name, dtype, device)
+                entry = {"tokenizer": tokenizer, "model": model, "refs": 0}
+                self._entries[key] = entry
+            else:
+                logger.debug("Reusing loaded HuggingFace model '%s'.", model_name)
+            entry["refs"] += 1
+            self._entries.move_to_end(key)
+            self._evict()
+            return entry["tokenizer"], entry["model"]
+
+    def release(self, model_name, dtype=None, device="cpu"):
+        key = (model_name, str(dtype) if dtype is not None else None, device)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["refs"] > 0:
+                entry["refs"] -= 1
+            self._evict()
+
+    def _evict(self):
+        # Oldest first; models still referenced by a transformer are never dropped
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_resident:
+                break
+            if self._entries[key]["refs"] == 0:
+                logger.debug("Evicting HuggingFace model '%s' from the registry.", key[0])
+                del self._entries[key]
+
+    def loaded(self):
+        """Return {key: reference count} for every resident model."""
+        with self._lock:
+            return {key: entry["refs"] for key, entry in self._entries.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def load_hf_model(model_name, dtype=None, device="cpu"):
+    """Load tokenizer and model, picking a seq2seq head for encoder-decoder checkpoints like T5."""
+    import torch
+    from transformers import AutoConfig, AutoModelForCausalLM, AutoModelForSeq2SeqLM, AutoTokenizer
+
+    config = AutoConfig.from_pretrained(model_name)
+    model_cls = AutoModelForSeq2SeqLM if getattr(config, "is_encoder_decoder", False) else AutoModelForCausalLM
+    torch_dtype = getattr(torch, dtype) if isinstance(dtype, str) else dtype
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = model_cls.from_pretrained(model_name, torch_dtype=torch_dtype)
+    model.to(device)
+    model.eval()
+    return tokenizer, model
+
+
+# Shared by every StyleTransformer in the process (including Streamlit reruns)
+registry = ModelRegistry()
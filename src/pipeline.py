@@ -1,79 +1,291 @@
-from src.text_preprocessing import TextPreprocessor
-from src.readability import get_readability_scores
+from src.text_preprocessing import TextPreprocessor, build_corrections
+from src.readability import get_readability_scores_batch
 from src.style_transform import StyleTransformer
-from src.create_diagram import create_diagram
+from src.completion_cache import CompletionCache
+from src.llm_client import LMStudioClient, DEFAULT_BASE_URL
+from src.incremental import FingerprintStore
+from contextlib import closing
 from pathlib import Path
+from queue import Queue
+from threading import Event, Thread
 import json
-import chardet  # add at the top
+import time
+import logging
+from src.decoding import read_text
+from src.metrics import PipelineMetrics, collector
+from src.segmentation import join_sentences, sentence_spans
 
+logger = logging.getLogger(__name__)
 
-def run_pipeline(input_path, model_name="local-model", lang="en"):
+# Output key -> style name passed to the model
+STYLE_NAMES = {
+    "academic": "academic",
+    "simple": "simple",
+    "children": "child-friendly"
+}
 
+# StyleTransformer backends: an LM Studio server, or HuggingFace weights loaded in-process
+BACKENDS = ("lm_studio", "hf")
 
-    # Detect encoding
-    raw_bytes = Path(input_path).read_bytes()
-    detected = chardet.detect(raw_bytes)
-    encoding = detected["encoding"] or "utf-8"
 
+def build_components(model_name="local-model", lang="en", max_concurrency=4, use_cache=True,
+                     base_url=DEFAULT_BASE_URL, lt_workers=0, mode="lm_studio"):
+    """
+    Create the StyleTransformer and TextPreprocessor used by run_pipeline.
+    Build them once and pass them to run_pipeline to keep models and LanguageTool warm across documents.
+    With `lt_workers` > 0, English correction uses that many shared LanguageTool servers
+    instead of starting a private one.
+    `mode` is the backend (see BACKENDS); with "hf" the weights come from the process-wide
+    model registry, so later components for the same model reuse them.
+    """
+    # Completions are cached on disk so re-running an unchanged document makes no model calls
+    cache = CompletionCache(bypass=not use_cache)
+    client = LMStudioClient(base_url=base_url, max_connections=max_concurrency)
+    transformer = StyleTransformer(mode=mode, model_name=model_name, lang=lang, max_concurrency=max_concurrency,
+                                   cache=cache, client=client)
+    pre = TextPreprocessor(lang=lang, llm=transformer, lt_workers=lt_workers)
+    return transformer, pre
+
+
+def _correct_incrementally(pre, sentences, store, metrics=None):
+    """Correct only the sentences the fingerprint store has not seen before."""
+    known = store.lookup_sentences(sentences)
+    missing = [idx for idx in range(len(sentences)) if idx not in known]
+    if missing:
+        fresh_sentences, fresh_counts = pre.correct_sentences([sentences[idx] for idx in missing], metrics=metrics)
+        known.update(zip(missing, zip(fresh_sentences, fresh_counts)))
+
+    corrected_sentences = [known[idx][0] for idx in range(len(sentences))]
+    issue_counts = [known[idx][1] for idx in range(len(sentences))]
+    logger.info("[Incremental] Reused %s/%s corrected sentences.", store.reused_sentences, len(sentences))
+    return corrected_sentences, issue_counts
+
+
+def _stream_transform(transformer, chunks, styles, known=None, stream=False, metrics=None):
+    """
+    Run transform_chunk_pairs in a background thread and yield its progress as it happens:
+    ("chunk", style, index, output) for every finished chunk and ("style", style, outputs)
+    once all chunks of a style are in. With `stream`, ("partial", style, index, text_so_far)
+    updates arrive while chunks are generated. Worker errors are re-raised in the caller.
+    Closing the generator early tells the worker to stop sending chunks to the model.
+    The workers record their timings, tokens and cache hits in `metrics`.
+    """
+    updates = Queue()
+    cancel = Event()
+    done = object()
+    on_partial = (lambda style, idx, text: updates.put(("partial", style, idx, text))) if stream else None
+
+    def work():
+        try:
+            transformer.transform_chunk_pairs(
+                chunks, styles, known=known,
+                on_chunk_done=lambda style, idx, output: updates.put(("chunk", style, idx, output)),
+                on_style_done=lambda style, outputs: updates.put(("style", style, list(outputs))),
+                on_chunk_partial=on_partial, cancel=cancel, metrics=metrics
+            )
+            updates.put(done)
+        except Exception as e:
+            updates.put(e)
+
+    Thread(target=work, daemon=True).start()
     try:
-        text = raw_bytes.decode(encoding)
-    except UnicodeDecodeError:
-        text = raw_bytes.decode("utf-8", errors="replace")  # last-resort fallback
-
-    # Step 1: Preprocessing with LanguageTool or Zemberek based on language
-    transformer = StyleTransformer(model_name=model_name, lang=lang)
-    pre = TextPreprocessor(lang=lang, llm=transformer)
-
-    corrected_text, corrections = pre.correct_text(text)
-
-    # If corrections exist, save them as JSON and print them
-    if corrections:
-        base = Path(input_path).stem
-        out_dir = Path("data/outputs")
-        out_dir.mkdir(parents=True, exist_ok=True)
-        with open(out_dir / f"{base}_corrections.json", "w", encoding="utf-8") as f:
-            json.dump(corrections, f, indent=2, ensure_ascii=False)
-
-        # Print corrections - adapt print format for Turkish if needed
-        for corr in corrections:
-            if lang == "en":
-                print(f"[Correction] {corr['original']} → {corr['corrected']} ({corr.get('num_issues', '?')} issues)")
-            elif lang == "tr":
-                # For Turkish, corrections have 'sentence' key and no 'num_issues'
-                print(f"[Correction] {corr['original']} → {corr['corrected']} (in sentence: {corr.get('sentence', '')})")
-
-    print(f'{corrected_text}')
-
-    corrected_file = out_dir / f"{base}_corrected.txt"
-    corrected_file.write_text(corrected_text, encoding="utf-8")
-    print(f"[Saved] Corrected version: {corrected_file}")
-
-    # Step 2: Style transformation (passing lang to StyleTransformer)
-    #transformer = StyleTransformer(model_name=model_name, lang=lang)
-    outputs = {
-        "academic": transformer.transform(corrected_text, "academic"),
-        "simple": transformer.transform(corrected_text, "simple"),
-        "children": transformer.transform(corrected_text, "child-friendly")
-    }
-
-    # Step 3: Readability analysis
-    scores = {k: get_readability_scores(v) for k, v in outputs.items()}
-
-    # Save output files
+        while True:
+            update = updates.get()
+            if update is done:
+                return
+            if isinstance(update, Exception):
+                raise update
+            yield update
+    finally:
+        cancel.set()
+
+
+def iter_pipeline(input_path, model_name="local-model", lang="en", max_concurrency=4, use_cache=True,
+                  base_url=DEFAULT_BASE_URL, transformer=None, preprocessor=None, incremental=False, text=None,
+                  lt_workers=0, metrics=None, stream=False, mode="lm_studio"):
+    """
+    Run the pipeline for one document, yielding an event dict as each stage produces results:
+
+    - {"type": "corrections", "corrected_text", "corrections"}
+    - {"type": "partial", "style", "index", "total", "text", "preview"} while a chunk streams
+      (only with `stream`)
+    - {"type": "chunk", "style", "index", "total", "text"} for every transformed chunk
+      (plus "preview" with `stream`)
+    - {"type": "style", "style", "text"} once a style is merged
+    - {"type": "readability", "scores"}
+    - {"type": "diagram", "path", "html"}
+    - {"type": "done", "outputs", "scores", "metrics", "trace"}
+
+    With `incremental`, per-sentence and per-chunk fingerprints saved next to the outputs let a
+    re-run reuse earlier corrections and transforms, so only edited parts are reprocessed.
+
+    With `stream`, LM Studio completions are streamed and each chunk's partial text is reported
+    as it arrives, along with the time to first token in the metrics. "preview" is the style's
+    chunks so far (finished or partial) joined in order; the "style" event carries the merged text.
+
+    `mode` selects the backend when the components are built here (see build_components).
+
+    `text` is the already-decoded document; without it the file at `input_path` is read and
+    decoded with src.decoding. `input_path` also names the output files.
+
+    Stage timings, token counts and cache hits are collected in `metrics` (a new PipelineMetrics
+    by default), saved as `<name>_trace.json` and added to the process-wide metrics collector.
+    Stage times do not include the time the caller spends handling events.
+
+    `metrics` is passed to every model call rather than set on the transformer, so runs sharing
+    one transformer (e.g. concurrent app sessions) never record into each other's metrics.
+
+    If the caller stops iterating early (or a stage fails), components built here are closed
+    and no further chunks are sent to the model.
+    """
+
     base = Path(input_path).stem
     out_dir = Path("data/outputs")
     out_dir.mkdir(parents=True, exist_ok=True)
+    metrics = metrics or PipelineMetrics(name=base)
+
+    # Components passed in by the caller are reused and left open
+    owns_components = transformer is None or preprocessor is None
+    if owns_components:
+        transformer, preprocessor = build_components(model_name, lang, max_concurrency, use_cache, base_url,
+                                                     lt_workers, mode)
+    pre = preprocessor
+
+    try:
+        # Decode once; callers that already hold the text (e.g. the app) pass it in
+        if text is None:
+            with metrics.stage("decode"):
+                text, encoding = read_text(input_path)
+            logger.debug("Decoded %s as %s", input_path, encoding)
+
+        # Step 1: Preprocessing with LanguageTool or Zemberek based on language
+        with metrics.stage("split"):
+            spans = pre.sentence_spans(text)
+            sentences = [text[start:end] for start, end in spans]
+        store = None
+        with metrics.stage("correction"):
+            if incremental:
+                store = FingerprintStore.for_input(input_path, out_dir, transformer.model_name, lang)
+                corrected_sentences, issue_counts = _correct_incrementally(pre, sentences, store, metrics)
+                metrics.incr("sentences_reused", store.reused_sentences)
+            else:
+                corrected_sentences, issue_counts = pre.correct_sentences(sentences, text, spans, metrics)
+        corrections = build_corrections(sentences, corrected_sentences, issue_counts)
+        # The corrected sentences become the corrected text's segmentation, so chunking does not re-split it
+        corrected_text = join_sentences(corrected_sentences, language=lang)
+        metrics.incr("sentences", len(sentences))
+        metrics.incr("corrections", len(corrections))
+
+        # If corrections exist, save them as JSON and log them
+        if corrections:
+            with open(out_dir / f"{base}_corrections.json", "w", encoding="utf-8") as f:
+                json.dump(corrections, f, indent=2, ensure_ascii=False)
+
+            # Log corrections - adapt format for Turkish if needed
+            if logger.isEnabledFor(logging.DEBUG):
+                for corr in corrections:
+                    if lang == "en":
+                        logger.debug("[Correction] %s → %s (%s issues)", corr['original'], corr['corrected'], corr.get('num_issues', '?'))
+                    elif lang == "tr":
+                        # For Turkish, corrections have 'sentence' key and no 'num_issues'
+                        logger.debug("[Correction] %s → %s (in sentence: %s)", corr['original'], corr['corrected'], corr.get('sentence', ''))
+
+        logger.debug("%s", corrected_text)
+
+        corrected_file = out_dir / f"{base}_corrected.txt"
+        corrected_file.write_text(corrected_text, encoding="utf-8")
+        logger.info("[Saved] Corrected version: %s", corrected_file)
+        yield {"type": "corrections", "corrected_text": corrected_text, "corrections": corrections}
+
+        # Step 2: Style transformation (passing lang to StyleTransformer)
+        styles = list(STYLE_NAMES.values())
+        style_keys = {style: key for key, style in STYLE_NAMES.items()}
+        with metrics.stage("chunking"):
+            chunks, carried = transformer.split_into_chunks(corrected_text, styles, stable_boundaries=incremental)
+            known = store.lookup_chunks(chunks, styles) if incremental else None
+        metrics.incr("chunks", len(chunks) * len(styles))
+        if incremental:
+            metrics.incr("chunks_reused", store.reused_chunks)
+            logger.info("[Incremental] Reused %s/%s chunk transforms.", store.reused_chunks, len(chunks) * len(styles))
+
+        outputs = {}
+        chunk_outputs = {}
+        # Latest text of every chunk per style, finished or still streaming, for streamed previews
+        drafts = {style: [(known or {}).get((style, idx), "") for idx in range(len(chunks))] for style in styles}
+        transform_start = time.perf_counter()
+        # Closed explicitly so an abandoned run stops dispatching chunks right away
+        # The transformer's workers report per-chunk timings, queue waits, tokens and cache hits into this run
+        with closing(_stream_transform(transformer, chunks, styles, known, stream, metrics)) as updates:
+            for update in updates:
+                if update[0] in ("partial", "chunk"):
+                    kind, style, idx, chunk_text = update
+                    event = {"type": kind, "style": style_keys[style], "index": idx, "total": len(chunks), "text": chunk_text}
+                    if stream:
+                        drafts[style][idx] = chunk_text
+                        event["preview"] = " ".join(draft for draft in drafts[style] if draft)
+                    yield event
+                else:
+                    _, style, transformed_chunks = update
+                    chunk_outputs[style] = transformed_chunks
+                    with metrics.stage("merge", style=style):
+                        outputs[style_keys[style]] = transformer.merge_chunks(transformed_chunks, carried)
+                    yield {"type": "style", "style": style_keys[style], "text": outputs[style_keys[style]]}
+        # Wall time of the whole fan-out; the per-chunk spans come from the transformer's workers
+        metrics.record("transform", transform_start, time.perf_counter() - transform_start)
+
+        # Keep the usual style order regardless of completion order
+        outputs = {key: outputs[key] for key in STYLE_NAMES}
+        if incremental:
+            store.update(sentences, corrected_sentences, issue_counts, chunks, chunk_outputs)
+            store.save()
+
+        # Step 3: Readability analysis
+        with metrics.stage("readability"):
+            texts = list(outputs.values())
+            # Merged outputs were segmented while merging, so these are cache hits
+            spans = [sentence_spans(output, language=lang) for output in texts]
+            scores = dict(zip(outputs, get_readability_scores_batch(texts, lang=lang, spans=spans)))
+
+        # Save output files
+        for style, content in outputs.items():
+            out_file = out_dir / f"{base}_{style}.txt"
+            out_file.write_text(content, encoding="utf-8")
+
+        with open(out_dir / f"{base}_readability.json", "w", encoding="utf-8") as f:
+            json.dump(scores, f, indent=2)
+        yield {"type": "readability", "scores": scores}
 
-    for style, content in outputs.items():
-        out_file = out_dir / f"{base}_{style}.txt"
-        out_file.write_text(content, encoding="utf-8")
+        # Step 4: Generate process diagram from the results in memory (plotly and networkx are only imported here)
+        with metrics.stage("diagram"):
+            from src.create_diagram import build_previews, render_diagram, save_diagram
+            diagram_html = render_diagram(Path(input_path).name,
+                                          build_previews(text, corrections, corrected_text, outputs, scores))
+            diagram_path = save_diagram(input_path, diagram_html, out_dir)
+        yield {"type": "diagram", "path": diagram_path, "html": diagram_html}
 
-    with open(out_dir / f"{base}_readability.json", "w", encoding="utf-8") as f:
-        json.dump(scores, f, indent=2)
+        if transformer.cache is not None:
+            stats = transformer.cache.stats()
+            logger.info("[Cache] hits=%s misses=%s entries=%s", stats['hits'], stats['misses'], stats['entries'])
+    finally:
+        if owns_components:
+            if transformer.cache is not None:
+                transformer.cache.close()
+            transformer.close()
 
+    trace_path = metrics.write_trace(out_dir / f"{base}_trace.json")
+    collector.add(metrics)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("[Metrics] Stage timings (trace: %s):\n  %s", trace_path, "\n  ".join(metrics.summary()))
+        logger.info("[Metrics] %s", ", ".join(f"{name}={value}" for name, value in sorted(metrics.counters.items())))
 
-    # Step 4: Generate process diagram
-    create_diagram(input_path)
+    yield {"type": "done", "outputs": outputs, "scores": scores, "metrics": metrics.to_dict(), "trace": trace_path}
 
 
-    return outputs, scores
+def run_pipeline(input_path, model_name="local-model", lang="en", max_concurrency=4, use_cache=True,
+                 base_url=DEFAULT_BASE_URL, transformer=None, preprocessor=None, incremental=False, text=None,
+                 lt_workers=0, metrics=None, mode="lm_studio"):
+    """Run the whole pipeline for one document and return (outputs, scores). See iter_pipeline."""
+    for event in iter_pipeline(input_path, model_name, lang, max_concurrency, use_cache, base_url,
+                               transformer, preprocessor, incremental, text, lt_workers, metrics, mode=mode):
+        if event["type"] == "done":
+            return event["outputs"], event["scores"]
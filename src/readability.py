@@ -1,18 +1,316 @@
-import textstat
-
-def get_readability_scores(text):
-    return {
-        "flesch_reading_ease": textstat.flesch_reading_ease(text),
-        "flesch_kincaid_grade": textstat.flesch_kincaid_grade(text),
-        "smog_index": textstat.smog_index(text),
-        "automated_readability_index": textstat.automated_readability_index(text),
-        "dale_chall_score": textstat.dale_chall_readability_score(text),
-        "cefr_estimate": estimate_cefr_level(text)
-    }
-
-def estimate_cefr_level(text):
+import math
+import re
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+# Same sentence heuristic textstat uses: runs of text ending in terminal punctuation
+SENTENCE_PATTERN = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+# Words keep inner apostrophes and hyphens ("aren't", "well-known")
+WORD_PATTERN = re.compile(r"[^\W_]+(?:['’\-][^\W_]+)*", re.UNICODE)
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+TURKISH_VOWELS = re.compile(r"[aeıioöuüâîû]")
+
+LEXICON_DIR = Path(__file__).parent / "lexicons"
+
+# Shared statistics every metric is derived from.
+# characters counts every non-whitespace character, punctuation included, as textstat does for ARI.
+# syllable_histogram[n] counts words with n syllables (the last bucket holds n and above).
+TextStats = namedtuple(
+    "TextStats",
+    ["sentences", "words", "syllables", "polysyllables", "characters", "difficult_words", "syllable_histogram"]
+)
+
+
+@lru_cache(maxsize=None)
+def load_lexicon(name):
+    """Load a one-word-per-line lexicon from src/lexicons into a frozenset ('#' lines are comments)."""
+    path = LEXICON_DIR / name
+    if not path.exists():
+        return frozenset()
+    with open(path, encoding="utf-8") as f:
+        return frozenset(
+            line.strip() for line in f
+            if line.strip() and not line.startswith("#")
+        )
+
+
+@lru_cache(maxsize=1)
+def _pyphen_dictionary():
+    try:
+        import pyphen
+        return pyphen.Pyphen(lang="en_US")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=1)
+def easy_words():
+    """Dale-Chall easy word list shipped with textstat, loaded once into a frozenset."""
+    try:
+        from importlib.resources import files
+        text = files("textstat").joinpath("resources/en/easy_words.txt").read_text(encoding="utf-8")
+        return frozenset(word.strip().lower() for word in text.splitlines() if word.strip())
+    except Exception:
+        return frozenset()
+
+
+@lru_cache(maxsize=100_000)
+def count_syllables(word):
+    """Syllables in a lowercase English word, via pyphen hyphenation with a vowel-group fallback."""
+    dictionary = _pyphen_dictionary()
+    if dictionary is not None:
+        return len(dictionary.positions(word)) + 1
+    count = len(VOWEL_GROUPS.findall(word))
+    if word.endswith("e") and not word.endswith("le") and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def compute_text_stats(text, lower=str.lower, syllables=None, is_easy=None, spans=None, word_table=None):
+    """
+    Walk the text once and collect the counts every readability formula needs.
+    `lower`, `syllables` and `is_easy` supply the language-specific word handling.
+    `spans` are (start, end) sentence offsets from src.segmentation; without them sentences
+    are found with textstat's punctuation heuristic.
+    `word_table` maps each word seen so far to (syllables, is difficult); pass the same dict for
+    several texts to analyse every distinct word only once.
+    """
+    syllables = syllables or count_syllables
+    word_table = {} if word_table is None else word_table
+    sentences = 0
+    short_sentences = 0
+    words = total_syllables = polysyllables = difficult = 0
+    characters = len("".join(text.split()))
+    histogram = [0] * 7
+
+    if spans is None:
+        spans = (match.span() for match in SENTENCE_PATTERN.finditer(text))
+
+    for start, end in spans:
+        sentence_words = WORD_PATTERN.findall(text, start, end)
+        sentences += 1
+        if len(sentence_words) <= 2:
+            short_sentences += 1
+        for word in sentence_words:
+            info = word_table.get(word)
+            if info is None:
+                lowered = lower(word)
+                word_syllables = syllables(lowered)
+                info = word_table[word] = (word_syllables, is_easy is not None and not is_easy(lowered, word_syllables))
+            word_syllables, is_difficult = info
+            words += 1
+            total_syllables += word_syllables
+            histogram[min(word_syllables, 6)] += 1
+            if word_syllables >= 3:
+                polysyllables += 1
+            if is_difficult:
+                difficult += 1
+
+    # Fragments of one or two words are not counted as sentences
+    if text:
+        sentences = max(1, sentences - short_sentences)
+    return TextStats(sentences, words, total_syllables, polysyllables, characters, difficult, tuple(histogram))
+
+
+class EnglishReadability:
+    """Flesch, FKGL, SMOG, ARI and Dale-Chall from one pass over the text."""
+
+    def compute_stats(self, text, spans=None, word_table=None):
+        easy = easy_words()
+
+        def is_easy(word, word_syllables):
+            # Without the Dale-Chall list, fall back to treating long words as difficult
+            return word in easy if easy else word_syllables < 3
+
+        return compute_text_stats(text, syllables=count_syllables, is_easy=is_easy, spans=spans, word_table=word_table)
+
+    def scores(self, stats):
+        if stats.words == 0 or stats.sentences == 0:
+            return {
+                "flesch_reading_ease": 0.0,
+                "flesch_kincaid_grade": 0.0,
+                "smog_index": 0.0,
+                "automated_readability_index": 0.0,
+                "dale_chall_score": 0.0,
+                "cefr_estimate": cefr_from_grade(0.0)
+            }
+
+        words_per_sentence = stats.words / stats.sentences
+        syllables_per_word = stats.syllables / stats.words
+        difficult_percent = 100 * stats.difficult_words / stats.words
+
+        grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+        # SMOG is only defined from three sentences on; textstat reports 0 below that
+        smog = 1.043 * math.sqrt(30 * stats.polysyllables / stats.sentences) + 3.1291 if stats.sentences >= 3 else 0.0
+        dale_chall = 0.1579 * difficult_percent + 0.0496 * words_per_sentence
+        if difficult_percent > 5:
+            dale_chall += 3.6365
+
+        return {
+            "flesch_reading_ease": 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word,
+            "flesch_kincaid_grade": grade,
+            "smog_index": smog,
+            "automated_readability_index": 4.71 * stats.characters / stats.words + 0.5 * words_per_sentence - 21.43,
+            "dale_chall_score": dale_chall,
+            "cefr_estimate": cefr_from_grade(grade)
+        }
+
+
+@lru_cache(maxsize=100_000)
+def count_syllables_tr(word):
+    """Turkish syllables map one-to-one onto vowels."""
+    return max(1, len(TURKISH_VOWELS.findall(word)))
+
+
+def lower_tr(word):
+    # Turkish dotted/dotless I do not round-trip through str.lower()
+    return word.replace("I", "ı").replace("İ", "i").lower()
+
+
+# Inflectional suffix templates: A = a/e, I = ı/i/u/ü (vowel harmony), D = d/t (consonant assimilation).
+# Derivational suffixes are left out on purpose, so "neden" does not make "nedensellik" easy.
+TURKISH_SUFFIX_TEMPLATES = (
+    # plural, possessive and buffer-consonant forms
+    "lAr", "Im", "In", "I", "sI", "ImIz", "InIz", "lArI", "yI", "nI", "m", "n", "mIz", "nIz",
+    # case endings
+    "A", "yA", "nA", "DA", "nDA", "DAn", "nDAn", "In", "nIn", "lA", "ylA", "ki",
+    # tense, mood and person endings
+    "DI", "mIş", "Iyor", "yor", "AcAk", "yAcAk", "Ir", "Ar", "r", "mAk", "mA", "sA", "ysA", "mAlI",
+    "sIn", "Iz", "yIz", "yIm", "sInIz", "DIr", "k", "ken", "yken", "Ip", "yIp", "DIk", "An", "yAn",
+)
+TURKISH_VOWEL_CLASSES = {"A": "ae", "I": "ıiuü", "D": "dt"}
+TURKISH_VOWEL_LETTERS = frozenset("aeıioöuüâîû")
+
+# Stem-final consonants soften before a vowel suffix (kitap -> kitabı, ağaç -> ağacı)
+SOFTENED_CONSONANTS = {"b": "p", "c": "ç", "d": "t", "ğ": "k"}
+
+
+def _expand_suffix(template):
+    forms = [""]
+    for char in template:
+        forms = [form + option for form in forms for option in TURKISH_VOWEL_CLASSES.get(char, char)]
+    return forms
+
+
+TURKISH_SUFFIXES = frozenset(form for template in TURKISH_SUFFIX_TEMPLATES for form in _expand_suffix(template))
+MAX_SUFFIX_LENGTH = max(len(suffix) for suffix in TURKISH_SUFFIXES)
+
+
+# Inflected words rarely carry more than this many suffixes on a common stem
+MAX_SUFFIXES = 3
+
+
+@lru_cache(maxsize=100_000)
+def is_suffix_chain(rest, after_vowel, budget=MAX_SUFFIXES):
+    """
+    True if `rest` splits into at most `budget` known inflectional suffixes.
+    `after_vowel` tells whether the text before `rest` ends in a vowel: a suffix starting with a
+    vowel needs a consonant before it, and a bare consonant suffix (-m, -n, -k, -r) needs a vowel.
+    """
+    if not rest:
+        return True
+    if budget == 0:
+        return False
+    for size in range(min(MAX_SUFFIX_LENGTH, len(rest)), 0, -1):
+        suffix = rest[:size]
+        if suffix not in TURKISH_SUFFIXES:
+            continue
+        starts_with_vowel = suffix[0] in TURKISH_VOWEL_LETTERS
+        if (starts_with_vowel and after_vowel) or (size == 1 and not starts_with_vowel and not after_vowel):
+            continue
+        if is_suffix_chain(rest[size:], suffix[-1] in TURKISH_VOWEL_LETTERS, budget - 1):
+            return True
+    return False
+
+
+class TurkishReadability:
+    """Ateşman and Bezirci–Yılmaz formulas with a rule-based Turkish syllable counter."""
+
+    # Shortest lexicon stem accepted for a suffixed word (two letters: ev, su, el); the rest must be inflections
+    min_stem = 2
+
+    def compute_stats(self, text, spans=None, word_table=None):
+        lexicon = load_lexicon("tr_frequent_words.txt")
+
+        def known_stem(stem):
+            if stem in lexicon:
+                return True
+            hard = SOFTENED_CONSONANTS.get(stem[-1])
+            return hard is not None and stem[:-1] + hard in lexicon
+
+        def is_easy(word, word_syllables):
+            # Turkish is agglutinative: a word is known if it is a lexicon stem followed only by inflections
+            if word in lexicon:
+                return True
+            return any(
+                is_suffix_chain(word[end:], word[end - 1] in TURKISH_VOWEL_LETTERS) and known_stem(word[:end])
+                for end in range(len(word) - 1, self.min_stem - 1, -1)
+            )
+
+        return compute_text_stats(text, lower=lower_tr, syllables=count_syllables_tr, is_easy=is_easy, spans=spans,
+                                  word_table=word_table)
+
+    def scores(self, stats):
+        if stats.words == 0 or stats.sentences == 0:
+            return {
+                "atesman_score": 0.0,
+                "bezirci_yilmaz_score": 0.0,
+                "difficult_word_ratio": 0.0,
+                "cefr_estimate": cefr_from_atesman(100.0)
+            }
+
+        words_per_sentence = stats.words / stats.sentences
+        syllables_per_word = stats.syllables / stats.words
+        atesman = 198.825 - 40.175 * syllables_per_word - 2.610 * words_per_sentence
+
+        # Average number of 3, 4, 5 and 6+ syllable words per sentence
+        h3, h4, h5, h6 = (count / stats.sentences for count in stats.syllable_histogram[3:7])
+        bezirci_yilmaz = math.sqrt(words_per_sentence * (h3 * 0.84 + h4 * 1.5 + h5 * 3.5 + h6 * 26.25))
+
+        return {
+            "atesman_score": atesman,
+            "bezirci_yilmaz_score": bezirci_yilmaz,
+            "difficult_word_ratio": stats.difficult_words / stats.words,
+            "cefr_estimate": cefr_from_atesman(atesman)
+        }
+
+
+# Per-language metric backends; unknown languages fall back to English
+READABILITY_BACKENDS = {
+    "en": EnglishReadability(),
+    "tr": TurkishReadability(),
+}
+
+
+def get_backend(lang="en"):
+    return READABILITY_BACKENDS.get(lang.lower(), READABILITY_BACKENDS["en"])
+
+
+def get_readability_scores(text, lang="en", spans=None):
+    backend = get_backend(lang)
+    return backend.scores(backend.compute_stats(text, spans))
+
+
+def get_readability_scores_batch(texts, lang="en", spans=None):
+    """
+    Score several texts with one shared word table: each distinct word across the batch is
+    lowercased, syllable-counted and checked against the difficulty lexicon once. Each text is
+    still split into sentences and words separately, and identical texts are scored only once.
+    `spans` optionally gives each text's sentence offsets. Returns one score dict per input text.
+    """
+    backend = get_backend(lang)
+    spans = spans or [None] * len(texts)
+    word_table = {}
+    unique = {}
+    for text, text_spans in zip(texts, spans):
+        if text not in unique:
+            unique[text] = backend.scores(backend.compute_stats(text, text_spans, word_table))
+    return [dict(unique[text]) for text in texts]
+
+
+def cefr_from_grade(grade):
     # Simple heuristic using Flesch grade
-    grade = textstat.flesch_kincaid_grade(text)
     if grade < 5:
         return "A1-A2"
     elif grade < 8:
@@ -22,4 +320,22 @@ def estimate_cefr_level(text):
     elif grade < 14:
         return "C1"
     else:
-        return "C2"
\ No newline at end of file
+        return "C2"
+
+
+def cefr_from_atesman(score):
+    # Ateşman bands: 90+ very easy, 70-89 easy, 50-69 medium, 30-49 hard, below 30 very hard
+    if score >= 90:
+        return "A1-A2"
+    elif score >= 70:
+        return "B1"
+    elif score >= 50:
+        return "B2"
+    elif score >= 30:
+        return "C1"
+    else:
+        return "C2"
+
+
+def estimate_cefr_level(text, lang="en"):
+    return get_readability_scores(text, lang)["cefr_estimate"]
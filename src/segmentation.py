@@ -0,0 +1,127 @@
+# src/segmentation.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# NLTK >= 3.9 loads punkt_tab; older releases use the pickled punkt models
+PUNKT_RESOURCES = ("tokenizers/punkt_tab", "tokenizers/punkt")
+
+# Pipeline language codes -> punkt model names
+PUNKT_LANGUAGES = {"en": "english", "tr": "turkish"}
+
+# Number of texts whose sentence spans are kept for reuse by later stages
+MAX_CACHED_TEXTS = 64
+
+_span_cache = OrderedDict()
+_span_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def ensure_punkt():
+    """
+    Make sure the punkt sentence models are available, checking only once per process.
+    Looks in the local NLTK data path first and only tries a quiet download if nothing is found;
+    a failed download (e.g. offline) is reported and does not raise.
+    Returns True if punkt is available.
+    """
+    import nltk
+
+    for resource in PUNKT_RESOURCES:
+        try:
+            nltk.data.find(resource)
+            return True
+        except LookupError:
+            continue
+
+    logger.debug("punkt not found locally, downloading...")
+    for package in ("punkt_tab", "punkt"):
+        try:
+            if nltk.download(package, quiet=True, raise_on_error=False):
+                return True
+        except Exception as e:
+            logger.warning("Could not download NLTK '%s': %s", package, e)
+    logger.warning("punkt is unavailable; sentence splitting will fail until it is installed.")
+    return False
+
+
+def punkt_language(lang):
+    """Map a language code ('en', 'tr') or a punkt model name to the punkt model name."""
+    lang = lang.lower()
+    return PUNKT_LANGUAGES.get(lang, lang)
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer(language="english"):
+    """The punkt sentence tokenizer for `language`, loaded once per process."""
+    ensure_punkt()
+    language = punkt_language(language)
+    logger.debug("Loading punkt model for %s", language)
+    try:
+        from nltk.tokenize.punkt import PunktTokenizer
+        return PunktTokenizer(language)
+    except (ImportError, LookupError):
+        # NLTK < 3.9 only ships the pickled models
+        import nltk
+        return nltk.data.load(f"tokenizers/punkt/{language}.pickle")
+
+
+def _cache_key(text, language):
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return language, len(text), digest
+
+
+def _remember(key, spans):
+    with _span_lock:
+        _span_cache[key] = spans
+        _span_cache.move_to_end(key)
+        while len(_span_cache) > MAX_CACHED_TEXTS:
+            _span_cache.popitem(last=False)
+
+
+def sentence_spans(text, language="english"):
+    """
+    (start, end) offsets of each sentence in `text`.
+    Results are memoized by a hash of the text, so every stage that segments the same text
+    (correction, chunking, merging, readability) shares one punkt pass.
+    """
+    language = punkt_language(language)
+    key = _cache_key(text, language)
+    with _span_lock:
+        spans = _span_cache.get(key)
+        if spans is not None:
+            _span_cache.move_to_end(key)
+            return spans
+
+    spans = tuple(load_tokenizer(language).span_tokenize(text))
+    _remember(key, spans)
+    return spans
+
+
+def sent_tokenize(text, language="english"):
+    """Sentences of `text` as strings, sliced from the shared spans."""
+    return [text[start:end] for start, end in sentence_spans(text, language)]
+
+
+def join_sentences(sentences, language="english", separator=" "):
+    """
+    Join sentences into one text and record their spans as its segmentation,
+    so stages that split the joined text later do not run punkt over it again.
+    """
+    spans = []
+    pos = 0
+    for sentence in sentences:
+        if sentence:
+            spans.append((pos, pos + len(sentence)))
+        pos += len(sentence) + len(separator)
+    text = separator.join(sentences)
+    _remember(_cache_key(text, punkt_language(language)), tuple(spans))
+    return text
+
+
+def clear_cache():
+    with _span_lock:
+        _span_cache.clear()
@@ -1,11 +1,16 @@
-import requests
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import math
+import re
+from threading import Thread
+import time
+from src.model_registry import registry
+from src.llm_client import LMStudioClient
+from src.chunking import chunk_sentences, get_token_counter, is_anchor_sentence, merge_sentence_chunks, tokenizer_counter
+from src.segmentation import join_sentences, sent_tokenize
+from src.metrics import NULL_METRICS
+import logging
 
-
-import nltk
-nltk.download('punkt')
-from nltk.tokenize import sent_tokenize
+logger = logging.getLogger(__name__)
 
 
 # Model context length lookup table
@@ -22,6 +27,39 @@ MODEL_CONTEXT_LIMITS = {
     "gemma-7b": 8192,
 }
 
+# Expected output length relative to the input, in tokens; child-friendly rewrites come out shorter
+STYLE_LENGTH_RATIOS = {
+    "academic": 1.3,
+    "simple": 1.0,
+    "child-friendly": 0.8,
+    "grammar": 1.1,
+}
+DEFAULT_LENGTH_RATIO = 1.2
+# Fixed extra output tokens, so very short chunks still get room for a full answer
+OUTPUT_TOKEN_MARGIN = 32
+
+# Instruction lines a model tends to echo once the rewrite is done; generation stops there
+STOP_SEQUENCES = {
+    "en": ["\nRewrite the following text", "\nReturn only the edited version"],
+    "tr": ["\nAşağıdaki metni", "\nSadece düzenlenmiş metni"],
+}
+
+# Last sentence-ending punctuation, with any closing quotes or brackets after it
+SENTENCE_END = re.compile(r"[.!?…][\"'”’»)\]]*(?=\s|$)")
+
+
+def cut_at_stop(text, stop_sequences):
+    """Cut text at the first stop sequence, for backends that do not stop on their own."""
+    positions = [pos for pos in (text.find(stop) for stop in stop_sequences) if pos != -1]
+    return text[:min(positions)] if positions else text
+
+
+def trim_to_sentence(text):
+    """Drop an unfinished trailing sentence; text without any sentence end is kept as is."""
+    ends = list(SENTENCE_END.finditer(text))
+    return text[:ends[-1].end()] if ends else text
+
+
 def get_model_context_length(model_name):
     model_name = model_name.lower()
     for key in MODEL_CONTEXT_LIMITS:
@@ -30,18 +68,30 @@ def get_model_context_length(model_name):
     return 4096  # default
 
 class StyleTransformer:
-    def __init__(self, mode="lm_studio", model_name="local-model", lang="en"):
+    def __init__(self, mode="lm_studio", model_name="local-model", lang="en", max_concurrency=4, cache=None,
+                 hf_dtype=None, hf_device="cpu", client=None):
         self.mode = mode
         self.model_name = model_name
         self.lang = lang.lower()
-
-        context_tokens = get_model_context_length(self.model_name)
-        self.context_tokens = context_tokens
-        self.chars_per_token = 3
-        self.window_size = context_tokens * self.chars_per_token
-        self.overlap_ratio = 0.2
-        self.overlap_chars = int(self.window_size * self.overlap_ratio)
-        print(f"[DEBUG] Model: {self.model_name}, context_tokens={context_tokens}, window_size={self.window_size}, overlap_chars={self.overlap_chars}")
+        # Maximum number of chunk requests in flight at once (1 = sequential)
+        self.max_concurrency = max(1, int(max_concurrency))
+        # Optional CompletionCache shared by every completion this transformer makes
+        self.cache = cache
+        # Pooled HTTP client for LM Studio, created lazily unless one is passed in
+        self._client = client
+        # Where calls record stage timings and token/cache counters unless they are given their own
+        # sink; the transformer may be shared, so per-run metrics are passed to each call instead
+        self.metrics = NULL_METRICS
+        self.temperature = 0.7
+        # Output budgets for single prompts; chunks get one sized from their own length instead
+        self.max_tokens = 512
+        self.hf_max_new_tokens = 200
+        # How far past the style's usual length ratio an output may run before it counts as runaway
+        self.length_headroom = 1.5
+        # Number of prompts padded together into one HF generate() call
+        self.hf_batch_size = 8
+        # Minimum seconds between partial-text callbacks while a chunk is streaming
+        self.stream_interval = 0.1
 
         if model_name.startswith("LM Studio:"):
             self.mode = "lm_studio"
@@ -49,11 +99,84 @@ class StyleTransformer:
         elif "/" in model_name and mode != "hf":
             self.mode = "lm_studio"
 
+        self.context_tokens = get_model_context_length(self.model_name)
+        # Number of trailing sentences repeated at the start of the next chunk
+        self.overlap_sentences = 1
+
+        self.hf_dtype = hf_dtype
+        self.hf_device = hf_device
+        self._hf_acquired = False
         if self.mode == "hf":
-            print("[DEBUG] Initializing HuggingFace model...")
-            self.hf_tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.hf_model = AutoModelForCausalLM.from_pretrained(self.model_name)
-            self.hf_model.eval()
+            logger.debug("Initializing HuggingFace model...")
+            # Weights are shared through the process-wide registry and loaded only once
+            self.hf_tokenizer, self.hf_model = registry.acquire(self.model_name, hf_dtype, hf_device)
+            self._hf_acquired = True
+            self._prepare_hf_tokenizer()
+            self.count_tokens = tokenizer_counter(self.hf_tokenizer)
+            # Prompts are never truncated, so chunks must fit the model's real input limit
+            model_max = getattr(self.hf_tokenizer, "model_max_length", None)
+            if model_max and model_max < 1_000_000:
+                self.context_tokens = min(self.context_tokens, model_max)
+        else:
+            # Without a local tokenizer, counts are language-scaled estimates
+            self.count_tokens = get_token_counter(self.model_name, self.lang)
+
+        logger.debug("Model: %s, context_tokens=%s, overlap_sentences=%s", self.model_name, self.context_tokens, self.overlap_sentences)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = LMStudioClient(max_connections=self.max_concurrency)
+        return self._client
+
+    def _prepare_hf_tokenizer(self):
+        """Configure padding so prompts of different lengths can share one generate() call."""
+        self.hf_encoder_decoder = getattr(self.hf_model.config, "is_encoder_decoder", False)
+        if self.hf_tokenizer.pad_token is None:
+            self.hf_tokenizer.pad_token = self.hf_tokenizer.eos_token
+        # Decoder-only models continue from the last position, so padding must go on the left
+        if not self.hf_encoder_decoder:
+            self.hf_tokenizer.padding_side = "left"
+
+    @property
+    def tokenizer_lang(self):
+        return 'turkish' if self.lang == 'tr' else 'english'
+
+    @property
+    def stop_sequences(self):
+        return STOP_SEQUENCES.get(self.lang, STOP_SEQUENCES["en"])
+
+    def output_ratio(self, style):
+        """Largest output/input token ratio allowed for `style` before generation is cut off."""
+        return STYLE_LENGTH_RATIOS.get(style, DEFAULT_LENGTH_RATIO) * self.length_headroom
+
+    def output_token_budget(self, text, style):
+        """max_tokens for rewriting `text` in `style`: its token count scaled by the style's output ratio."""
+        return math.ceil(self.count_tokens(text) * self.output_ratio(style)) + OUTPUT_TOKEN_MARGIN
+
+    def chunk_token_budget(self, styles):
+        """
+        Tokens available for the chunk text itself. The output budget grows with the chunk, so the
+        context window minus the largest prompt template among `styles` is shared between the
+        chunk and its longest allowed output.
+        """
+        prompt_tokens = max(self.count_tokens(self.build_prompt("", style)) for style in styles)
+        ratio = max(self.output_ratio(style) for style in styles)
+        return max(1, int((self.context_tokens - prompt_tokens - OUTPUT_TOKEN_MARGIN) / (1 + ratio)))
+
+    def split_into_chunks(self, text, styles=("academic",), stable_boundaries=False):
+        """
+        Split text into sentence-aligned chunks that fit the token budget for `styles`.
+        With `stable_boundaries`, chunk edges are also anchored to the sentences themselves so an
+        edit only changes the chunks around it (used for incremental re-processing).
+        Returns (chunks, carried), with the per-chunk carried-over sentence counts for merge_chunks.
+        """
+        sentences = sent_tokenize(text, language=self.tokenizer_lang)
+        budget = self.chunk_token_budget(styles)
+        boundary = is_anchor_sentence if stable_boundaries else None
+        chunks, carried = chunk_sentences(sentences, budget, self.count_tokens, self.overlap_sentences, boundary)
+        logger.debug("Split text into %s chunks (budget=%s tokens, overlap=%s sentences)", len(chunks), budget, self.overlap_sentences)
+        return chunks, carried
 
     def build_prompt(self, text, style):
         if self.lang == "en":
@@ -64,81 +187,390 @@ class StyleTransformer:
             return f"Rewrite the following text in {style} style:\n{text}\nReturn only the edited version."
 
     def transform(self, text, style="academic"):
-        print(f"[DEBUG] Starting sliding window transformation for style '{style}'...")
-        chunks = self.split_with_overlap(text, self.window_size, self.overlap_chars)
-        transformed_chunks = []
-
-        for idx, chunk in enumerate(chunks):
-            print(f"[DEBUG] Processing chunk {idx+1}/{len(chunks)}...")
-            prompt = self.build_prompt(chunk, style)
-            if self.mode == "lm_studio":
-                result = self._lm_studio_transform(prompt, style)
-            elif "hf" in self.mode or "/" in self.model_name:
-                result = self._hf_transform(prompt)
+        logger.debug("Starting chunked transformation for style '%s'...", style)
+        chunks, carried = self.split_into_chunks(text, [style])
+        transformed_chunks = self.transform_chunks(chunks, style)
+        final_text = self.merge_chunks(transformed_chunks, carried)
+        return final_text
+
+    def transform_chunks(self, chunks, style):
+        """
+        Transform a list of chunks, dispatching up to `max_concurrency` requests at once.
+        Results are returned in the same order as the input chunks.
+        """
+        return self.transform_chunk_pairs(chunks, [style])[style]
+
+    def transform_many(self, text, styles):
+        """
+        Transform the same text into several styles at once.
+        The text is chunked a single time and every (style, chunk) pair is scheduled on one
+        shared pool capped at `max_concurrency`. Each style is merged as soon as its last chunk
+        finishes, so total latency tracks the slowest style rather than the sum of all of them.
+        Returns a dict mapping each style to its merged text.
+        """
+        chunks, carried = self.split_into_chunks(text, styles)
+        outputs = {}
+
+        def merge_style(style, transformed_chunks):
+            logger.debug("All chunks finished for style '%s', merging...", style)
+            outputs[style] = self.merge_chunks(transformed_chunks, carried)
+
+        self.transform_chunk_pairs(chunks, styles, on_style_done=merge_style)
+        # Preserve the caller's style order
+        return {style: outputs[style] for style in styles}
+
+    def transform_chunk_pairs(self, chunks, styles, known=None, on_style_done=None, on_chunk_done=None,
+                              on_chunk_partial=None, cancel=None, metrics=None):
+        """
+        Transform every (style, chunk) pair that is not already in `known`
+        (a {(style, chunk_index): output} dict of results to reuse).
+        `on_chunk_done(style, index, output)` is called for every newly transformed chunk and
+        `on_style_done(style, outputs)` as soon as all chunks of a style are available.
+        With `on_chunk_partial(style, index, text_so_far)`, LM Studio completions are streamed and
+        the callback receives each chunk's text while it is generated (HF batches are not streamed).
+        Once `cancel` (a threading.Event) is set, no further chunks are sent to the model; chunks
+        already in flight still finish, and the results gathered so far are returned.
+        Timings, tokens and cache hits go to `metrics` (self.metrics by default).
+        Returns {style: [output per chunk]}.
+        """
+        metrics = metrics or self.metrics
+        known = known or {}
+        total = len(chunks)
+        results = {style: [known.get((style, idx)) for idx in range(total)] for style in styles}
+        remaining = {style: sum(1 for out in results[style] if out is None) for style in styles}
+        pending = [(style, idx) for style in styles for idx in range(total) if results[style][idx] is None]
+
+        def finish(style, idx, output):
+            results[style][idx] = output
+            if on_chunk_done is not None:
+                on_chunk_done(style, idx, output)
+            remaining[style] -= 1
+            if remaining[style] == 0 and on_style_done is not None:
+                on_style_done(style, results[style])
+
+        # Styles that need no model calls at all are done straight away
+        for style in styles:
+            if remaining[style] == 0 and on_style_done is not None:
+                on_style_done(style, results[style])
+        if not pending:
+            return results
+
+        def cancelled():
+            return cancel is not None and cancel.is_set()
+
+        if self.mode == "hf":
+            if cancelled():
+                return results
+            # The HF model runs in-process, so every pending prompt goes through batched generate()
+            generated = self.hf_generate_batch(
+                [self.build_prompt(chunks[idx], style) for style, idx in pending],
+                [self.output_token_budget(chunks[idx], style) for style, idx in pending],
+                metrics
+            )
+            for (style, idx), output in zip(pending, generated):
+                finish(style, idx, output)
+            return results
+
+        workers = min(self.max_concurrency, len(pending))
+        if workers <= 1:
+            for style, idx in pending:
+                if cancelled():
+                    break
+                finish(style, idx, self._transform_chunk(chunks[idx], style, idx, total, on_chunk_partial, metrics))
+            return results
+
+        logger.debug("Fan-out: %s (style, chunk) pairs with up to %s in flight...", len(pending), workers)
+        def run(chunk, style, idx, submitted):
+            if cancelled():
+                return None
+            # Time spent waiting for a free worker
+            metrics.record("queue_wait", submitted, time.perf_counter() - submitted, style=style, index=idx)
+            return self._transform_chunk(chunk, style, idx, total, on_chunk_partial, metrics)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(run, chunks[idx], style, idx, time.perf_counter()): (style, idx)
+                for style, idx in pending
+            }
+            try:
+                for future in as_completed(futures):
+                    if cancelled():
+                        # Drop the queued chunks; the with block waits for the ones in flight
+                        for queued in futures:
+                            queued.cancel()
+                        break
+                    style, idx = futures[future]
+                    finish(style, idx, future.result())
+            except Exception:
+                # Don't keep sending chunks once one of them has failed
+                for future in futures:
+                    future.cancel()
+                raise
+        return results
+
+    def _transform_chunk(self, chunk, style, idx=0, total=1, on_partial=None, metrics=None):
+        metrics = metrics or self.metrics
+        logger.debug("Processing chunk %s/%s...", idx+1, total)
+        prompt = self.build_prompt(chunk, style)
+        # The output budget follows the chunk's own length instead of one fixed max_tokens
+        max_tokens = self.output_token_budget(chunk, style)
+        with metrics.stage("transform_chunk", style=style, index=idx):
+            if on_partial is None:
+                return self.complete(prompt, style, max_tokens, metrics)
+            return self._stream_chunk(prompt, style, idx, on_partial, max_tokens, metrics)
+
+    def _stream_chunk(self, prompt, style, idx, on_partial, max_tokens=None, metrics=None):
+        """
+        Stream one chunk's completion, recording its time to first token and passing the text so
+        far to `on_partial(style, index, text)` at most every `stream_interval` seconds.
+        """
+        metrics = metrics or self.metrics
+        start = time.perf_counter()
+        pieces = []
+        last_update = None
+        usage = {}
+        for piece in self.stream_complete(prompt, style, max_tokens, usage=usage, metrics=metrics):
+            now = time.perf_counter()
+            if not pieces:
+                metrics.record("first_token", start, now - start, style=style, index=idx)
+            pieces.append(piece)
+            if last_update is None or now - last_update >= self.stream_interval:
+                on_partial(style, idx, "".join(pieces))
+                last_update = now
+        max_tokens = max_tokens or (self.hf_max_new_tokens if self.mode == "hf" else self.max_tokens)
+        # The LM Studio stream already reported (and cached) its finished reply
+        return self.finish_output("".join(pieces), max_tokens, usage.get("completion_tokens"),
+                                  report=self.mode != "lm_studio", metrics=metrics,
+                                  finish_reason=usage.get("finish_reason"))
+
+    def finish_output(self, text, max_tokens, completion_tokens=None, report=True, metrics=None, finish_reason=None):
+        """
+        Cut a completion at the stop sequences and apply the length guard: an output that used up
+        its whole budget ran away or was cut off mid-sentence, so it is trimmed to its last full sentence.
+        A server's `finish_reason` decides whether the budget was hit; without one, tokens are counted.
+        `report` logs and counts trimmed outputs (in `metrics`, self.metrics by default).
+        """
+        text = cut_at_stop(text, self.stop_sequences).strip()
+        if finish_reason is not None:
+            hit_budget = finish_reason == "length"
+        else:
+            hit_budget = (completion_tokens or self.count_tokens(text)) >= max_tokens
+        if hit_budget:
+            if report:
+                logger.warning("Output reached its %s-token budget (finish_reason=%s), trimming it to the last full sentence.",
+                               max_tokens, finish_reason or "unknown")
+                (metrics or self.metrics).incr("truncated_outputs")
+            text = trim_to_sentence(text)
+        return text
+
+    def complete(self, prompt, style="raw", max_tokens=None, metrics=None):
+        """
+        Send a single, already-built prompt to the backend without chunking or merging.
+        `max_tokens` overrides the default output budget for this call; tokens and cache hits
+        are counted in `metrics` (self.metrics by default).
+        """
+        metrics = metrics or self.metrics
+        if self.mode == "lm_studio":
+            return self._lm_studio_transform(prompt, style, max_tokens, metrics)
+        elif "hf" in self.mode or "/" in self.model_name:
+            return self._hf_transform(prompt, max_tokens, metrics)
+        else:
+            raise NotImplementedError("Unknown mode.")
+
+    def _cache_lookup(self, prompt, style, max_tokens, metrics):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.model_name, prompt, self.temperature, max_tokens)
+        if cached is not None:
+            logger.debug("Cache hit for style '%s'.", style)
+            metrics.incr("cache_hits")
+            return cached
+        metrics.incr("cache_misses")
+        return None
+
+    def _lm_studio_transform(self, prompt, style, max_tokens=None, metrics=None):
+        max_tokens = max_tokens or self.max_tokens
+        metrics = metrics or self.metrics
+        cached = self._cache_lookup(prompt, style, max_tokens, metrics)
+        if cached is not None:
+            return cached
+
+        logger.debug("Sending prompt to LM Studio for style '%s'...", style)
+        # Raises LLMError subclasses instead of leaking an error string into the output
+        content, usage = self.client.chat_completion(self.model_name, prompt, self.temperature, max_tokens,
+                                                     stop=self.stop_sequences)
+        logger.debug("Response received from LM Studio.")
+        self.record_usage(prompt, content, usage, metrics)
+        content = self.finish_output(content, max_tokens, usage.get("completion_tokens"), metrics=metrics,
+                                     finish_reason=usage.get("finish_reason"))
+
+        if self.cache is not None:
+            self.cache.put(self.model_name, prompt, self.temperature, max_tokens, content)
+        return content
+
+    def _lm_studio_stream(self, prompt, style, max_tokens=None, usage=None, metrics=None):
+        """
+        Stream a completion from LM Studio over server-sent events; the full reply is cached at the end.
+        `usage` is filled with the server's token accounting, as in LMStudioClient.stream_chat.
+        """
+        max_tokens = max_tokens or self.max_tokens
+        metrics = metrics or self.metrics
+        cached = self._cache_lookup(prompt, style, max_tokens, metrics)
+        if cached is not None:
+            yield cached
+            return
+
+        logger.debug("Streaming prompt to LM Studio for style '%s'...", style)
+        usage = {} if usage is None else usage
+        pieces = []
+        for piece in self.client.stream_chat(self.model_name, prompt, self.temperature, max_tokens, usage=usage,
+                                             stop=self.stop_sequences):
+            # The non-streaming reply is stripped, so leading whitespace is dropped here too
+            if not pieces:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+            pieces.append(piece)
+            yield piece
+        content = "".join(pieces).strip()
+        self.record_usage(prompt, content, usage, metrics)
+        content = self.finish_output(content, max_tokens, usage.get("completion_tokens"), metrics=metrics,
+                                     finish_reason=usage.get("finish_reason"))
+
+        if self.cache is not None:
+            self.cache.put(self.model_name, prompt, self.temperature, max_tokens, content)
+
+    def record_usage(self, prompt, content, usage, metrics=None):
+        """Count one model request and its tokens, estimating them when the server reports none."""
+        metrics = metrics or self.metrics
+        if metrics is NULL_METRICS:
+            return
+        metrics.incr("llm_requests")
+        metrics.incr("prompt_tokens", usage.get("prompt_tokens") or self.count_tokens(prompt))
+        metrics.incr("completion_tokens", usage.get("completion_tokens") or self.count_tokens(content))
+
+    def _hf_transform(self, prompt, max_new_tokens=None, metrics=None):
+        return self.hf_generate_batch([prompt], max_new_tokens, metrics)[0]
+
+    def hf_generate_batch(self, prompts, max_new_tokens=None, metrics=None):
+        """
+        Generate completions for many prompts with the HF model, padding up to
+        `hf_batch_size` prompts into each generate() call. Cached prompts are skipped.
+        `max_new_tokens` is one budget for every prompt or a list with one per prompt; prompts with
+        similar budgets are batched together and each output is held to its own budget.
+        Returns the completions in prompt order.
+        """
+        # Only the HF backend needs torch, so it is imported here rather than at module load
+        import torch
+
+        metrics = metrics or self.metrics
+        if isinstance(max_new_tokens, (list, tuple)):
+            budgets = list(max_new_tokens)
+        else:
+            budgets = [max_new_tokens or self.hf_max_new_tokens] * len(prompts)
+        results = [None] * len(prompts)
+        pending = []
+        for idx, prompt in enumerate(prompts):
+            cached = self.cache.get(self.model_name, prompt, None, budgets[idx]) if self.cache is not None else None
+            if cached is not None:
+                results[idx] = cached
             else:
-                raise NotImplementedError("Unknown mode.")
-            transformed_chunks.append(result)
+                pending.append(idx)
+        if self.cache is not None:
+            metrics.incr("cache_hits", len(prompts) - len(pending))
+            metrics.incr("cache_misses", len(pending))
+        # A batch decodes for as long as its largest budget, so keep budgets within a batch close
+        pending.sort(key=lambda idx: budgets[idx])
 
-        final_text = self.merge_chunks(transformed_chunks)
-        return final_text
+        for start in range(0, len(pending), self.hf_batch_size):
+            batch = pending[start:start + self.hf_batch_size]
+            batch_budget = max(budgets[idx] for idx in batch)
+            logger.debug("HF generate for %s prompts (%s/%s)...", len(batch), start + len(batch), len(pending))
+            inputs = self.hf_tokenizer([prompts[idx] for idx in batch], return_tensors="pt", padding=True)
+            inputs = inputs.to(self.hf_model.device)
+            with metrics.stage("hf_generate", prompts=len(batch)), torch.no_grad():
+                outputs = self.hf_model.generate(**inputs, max_new_tokens=batch_budget)
+            # Decoder-only models echo the prompt, keep only the newly generated tokens
+            if not self.hf_encoder_decoder:
+                outputs = outputs[:, inputs["input_ids"].shape[1]:]
+            rows = [row[:budgets[idx]] for idx, row in zip(batch, outputs)]
+            row_tokens = [int((row != self.hf_tokenizer.pad_token_id).sum()) for row in rows]
+            metrics.incr("llm_requests", len(batch))
+            metrics.incr("prompt_tokens", int(inputs["attention_mask"].sum()))
+            metrics.incr("completion_tokens", sum(row_tokens))
+            texts = self.hf_tokenizer.batch_decode(rows, skip_special_tokens=True)
 
-    def _lm_studio_transform(self, prompt, style):
-        url = "http://localhost:1234/v1/chat/completions"
-        headers = {"Content-Type": "application/json"}
-        payload = {
-            "model": self.model_name,
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-            "max_tokens": 512
-        }
+            for idx, text, tokens in zip(batch, texts, row_tokens):
+                results[idx] = self.finish_output(text, budgets[idx], tokens, metrics=metrics)
+                if self.cache is not None:
+                    self.cache.put(self.model_name, prompts[idx], None, budgets[idx], results[idx])
+        return results
 
-        try:
-            print(f"[DEBUG] Sending prompt to LM Studio for style '{style}'...")
-            response = requests.post(url, headers=headers, json=payload)
-            print("[DEBUG] Response received from LM Studio.")
-            return response.json()["choices"][0]["message"]["content"].strip()
-        except Exception as e:
-            print(f"[ERROR] LM Studio Error: {e}")
-            return "Error during transformation."
+    def stream_complete(self, prompt, style="raw", max_tokens=None, usage=None, metrics=None):
+        """
+        Yield the completion for a prompt piece by piece as it is generated.
+        LM Studio replies arrive as server-sent events and the HF backend streams tokens.
+        The pieces are raw model output; finish_output() applies the stop sequences and length guard.
+        """
+        if self.mode == "lm_studio":
+            yield from self._lm_studio_stream(prompt, style, max_tokens, usage, metrics)
+            return
+        if self.mode != "hf":
+            yield self.complete(prompt, style, max_tokens, metrics)
+            return
 
-    def _hf_transform(self, prompt):
-        inputs = self.hf_tokenizer(prompt, return_tensors="pt", truncation=True)
-        with torch.no_grad():
-            outputs = self.hf_model.generate(**inputs, max_new_tokens=200)
-        output_text = self.hf_tokenizer.decode(outputs[0], skip_special_tokens=True)
-        return output_text
+        max_new_tokens = max_tokens or self.hf_max_new_tokens
+        import torch
+        from transformers import TextIteratorStreamer
 
-    def split_with_overlap(self, text, window_size, overlap_chars):
-        step = window_size - overlap_chars
-        chunks = [text[i:i+window_size] for i in range(0, len(text), step)]
-        print(f"[DEBUG] Split text into {len(chunks)} chunks (window={window_size}, overlap={overlap_chars})")
-        return chunks
+        streamer = TextIteratorStreamer(self.hf_tokenizer, skip_prompt=True, skip_special_tokens=True)
+        inputs = self.hf_tokenizer(prompt, return_tensors="pt").to(self.hf_model.device)
 
+        def generate():
+            with torch.no_grad():
+                self.hf_model.generate(**inputs, max_new_tokens=max_new_tokens, streamer=streamer)
 
-    def merge_chunks(self, chunks):
-        print("[DEBUG] Merging chunks using sentence-aware logic...")
+        thread = Thread(target=generate, daemon=True)
+        thread.start()
+        for text in streamer:
+            if text:
+                yield text
+        thread.join()
 
-        merged_sentences = []
-        seen_sentences = set()
+    def close(self):
+        """Close the HTTP client and release this transformer's reference to the shared HF model."""
+        if self._client is not None:
+            self._client.close()
+        if self._hf_acquired:
+            registry.release(self.model_name, self.hf_dtype, self.hf_device)
+            self._hf_acquired = False
 
-        # Select tokenizer language
-        lang = self.lang if hasattr(self, 'lang') else 'en'  # fallback
-        tokenizer_lang = 'turkish' if lang == 'tr' else 'english'
+    def __del__(self):
+        try:
+            self.close()
+        except Exception as e:
+            logger.warning("Failed to release HF model: %s", e)
 
-        for idx, chunk in enumerate(chunks):
-            sentences = sent_tokenize(chunk, language=tokenizer_lang)
-            new_sentences = []
+    def merge_chunks(self, chunks, carried=None):
+        """
+        Merge transformed chunks, dropping the sentences each one repeats from the previous chunk.
+        `carried` gives the per-chunk carried-over counts from split_into_chunks; without it every
+        chunk is assumed to carry `overlap_sentences`.
+        """
+        logger.debug("Merging chunks using overlap alignment...")
 
-            for sent in sentences:
-                cleaned_sent = sent.strip()
-                if cleaned_sent and cleaned_sent not in seen_sentences:
-                    new_sentences.append(cleaned_sent)
-                    seen_sentences.add(cleaned_sent)
+        chunk_sentences_list = []
+        for chunk in chunks:
+            sentences = [sent.strip() for sent in sent_tokenize(chunk, language=self.tokenizer_lang)]
+            chunk_sentences_list.append([sent for sent in sentences if sent])
 
-            print(f"[DEBUG] Chunk {idx+1}: {len(new_sentences)} new sentences added.")
-            merged_sentences.extend(new_sentences)
+        # Only the carried-over sentences can repeat; one extra allows for a paraphrase splitting them
+        if carried is None:
+            carried = [self.overlap_sentences] * len(chunks)
+        max_overlap = [count + 1 if count > 0 else 0 for count in carried]
+        merged_sentences = merge_sentence_chunks(chunk_sentences_list, max_overlap=max_overlap)
 
-        final_text = " ".join(merged_sentences)
-        print(f"[DEBUG] Final merged text length: {len(final_text)} characters.")
+        # Recorded as the merged text's segmentation for the readability stage
+        final_text = join_sentences(merged_sentences, language=self.tokenizer_lang)
+        logger.debug("Final merged text length: %s characters.", len(final_text))
         return final_text
-
@@ -1,94 +1,337 @@
 # src/text_preprocessing.py 
+import logging
 import os
-import nltk
-from nltk.tokenize import sent_tokenize
 import subprocess
+import re
+from bisect import bisect_right
+from src.segmentation import join_sentences, punkt_language, sent_tokenize, sentence_spans
 
-nltk.download('punkt')
+logger = logging.getLogger(__name__)
 
 # Ensure JAVA_HOME and PATH are set (adjust to your actual JDK path)
 os.environ["JAVA_HOME"] = r"C:\Users\PC_6155__\AppData\Local\Programs\Eclipse Adoptium\jdk-21.0.8.9-hotspot"
 os.environ["PATH"] = os.path.join(os.environ["JAVA_HOME"], "bin") + ";" + os.environ["PATH"]
 
 
+# Upper bound on characters sent to LanguageTool in a single check() call
+DEFAULT_BATCH_CHARS = 20000
+# 0 runs a private in-process LanguageTool; more uses that many shared pooled servers
+DEFAULT_LT_WORKERS = 0
+
+
+def locate_sentences(text, sentences):
+    """
+    Locate each tokenized sentence in the original text.
+    Returns a list of (start, end) offsets, or None if a sentence cannot be found verbatim.
+    """
+    spans = []
+    pos = 0
+    for sentence in sentences:
+        start = text.find(sentence, pos)
+        if start == -1:
+            return None
+        end = start + len(sentence)
+        spans.append((start, end))
+        pos = end
+    return spans
+
+
+def _match_error_length(match):
+    # language_tool_python renamed errorLength in newer releases
+    return getattr(match, "errorLength", None) or getattr(match, "error_length", 0)
+
+
+def apply_matches(text, matches):
+    """
+    Apply the first replacement of each (offset, length, replacement) fix to text.
+    Mirrors language_tool_python.utils.correct: overlapping fixes after the first are skipped.
+    """
+    result = []
+    cursor = 0
+    for offset, length, replacement in sorted(matches, key=lambda m: m[0]):
+        if offset < cursor:
+            continue
+        result.append(text[cursor:offset])
+        result.append(replacement)
+        cursor = offset + length
+    result.append(text[cursor:])
+    return ''.join(result)
+
+
+def build_corrections(sentences, corrected_sentences, issue_counts):
+    """Correction log entries for every sentence that changed."""
+    corrections = []
+    for original, corrected, num_issues in zip(sentences, corrected_sentences, issue_counts):
+        if original == corrected:
+            continue
+        entry = {"original": original, "corrected": corrected}
+        if num_issues is not None:
+            entry["num_issues"] = num_issues
+        corrections.append(entry)
+    return corrections
+
+
+# Matches "12. sentence" or "12) sentence" lines in a numbered LLM reply
+NUMBERED_LINE = re.compile(r"^\s*(\d+)\s*[.)]\s*(\S.*?)\s*$")
+
+
+def parse_numbered_lines(reply):
+    """Parse a numbered list reply into a {number: text} dict."""
+    items = {}
+    for line in reply.splitlines():
+        match = NUMBERED_LINE.match(line)
+        if match:
+            items.setdefault(int(match.group(1)), match.group(2))
+    return items
+
+
 class TextPreprocessor:
-    def __init__(self, lang='en', llm=None):
+    def __init__(self, lang='en', llm=None, batch_chars=DEFAULT_BATCH_CHARS, lt_workers=DEFAULT_LT_WORKERS):
         self.lang = lang.lower()
+        self.language = punkt_language(self.lang)  # punkt model used to split sentences
         self.tool = None  # Safe default
+        self.pool = None  # Shared LanguageTool servers, when lt_workers > 0
         self.llm = llm  # For Turkish LLM correction
+        self.batch_chars = batch_chars  # 0 disables bulk LanguageTool checks
 
         if self.lang == 'en':
-            import language_tool_python
-            print("Initializing LanguageTool for English...")
-            self.tool = language_tool_python.LanguageTool('en-US')
+            if lt_workers > 0:
+                from src.languagetool_pool import get_pool
+                logger.info("Using the LanguageTool server pool (%s workers) for English...", lt_workers)
+                self.pool = get_pool('en-US', lt_workers)
+            else:
+                import language_tool_python
+                logger.info("Initializing LanguageTool for English...")
+                self.tool = language_tool_python.LanguageTool('en-US')
 
         elif self.lang == 'tr':
             if self.llm is None:
                 raise ValueError("LLM must be provided for Turkish.")
-            print("Using LLM for Turkish grammar correction...")
+            logger.info("Using LLM for Turkish grammar correction...")
 
         else:
             raise ValueError(f"Unsupported language: {lang}")
 
+    def split_sentences(self, text):
+        return sent_tokenize(text, language=self.language)
+
+    def sentence_spans(self, text):
+        """(start, end) offsets of each sentence, shared with later stages through the segmentation cache."""
+        return sentence_spans(text, language=self.language)
+
     def correct_text(self, text):
-        sentences = sent_tokenize(text)
-        corrected_sentences = []
-        corrections = []
+        spans = self.sentence_spans(text)
+        sentences = [text[start:end] for start, end in spans]
+        corrected_sentences, issue_counts = self.correct_sentences(sentences, text, spans)
+        corrections = build_corrections(sentences, corrected_sentences, issue_counts)
+        corrected_text = join_sentences(corrected_sentences, language=self.language)
+        return corrected_text, corrections
 
+    def correct_sentences(self, sentences, text=None, spans=None, metrics=None):
+        """
+        Correct a list of sentences. `text` is the source they were split from, if available,
+        and `spans` their offsets in it; otherwise they are checked as if joined by single spaces.
+        Turkish LLM calls record their tokens and cache hits in `metrics`, if given.
+        Returns (corrected_sentences, issue_counts); issue counts are None for Turkish.
+        """
         if self.lang == 'en':
-            for sentence in sentences:
-                try:
-                    matches = self.tool.check(sentence)
-                    corrected_sent = self.tool.correct(sentence)
-                    corrected_sentences.append(corrected_sent)
-                except Exception as e:
-                    print(f"[Warning] Error correcting sentence: '{sentence}' → {e}")
-                    corrected_sentences.append(sentence)
-
-            correction_list = [
-                {
-                    "original": s,
-                    "corrected": c,
-                    "num_issues": len(self.tool.check(s))
-                }
-                for s, c in zip(sentences, corrected_sentences)
-                if s != c
+            if text is None:
+                text, spans = ' '.join(sentences), None
+            if not self.batch_chars:
+                spans = None
+            elif spans is None:
+                spans = locate_sentences(text, sentences)
+            if spans is None:
+                return self._correct_sentences_individually(sentences)
+            return self._correct_sentences_batched(text, sentences, spans)
+
+        elif self.lang == 'tr':
+            return self.correct_sentences_tr_with_llm(sentences, metrics), [None] * len(sentences)
+
+    def check_many(self, texts):
+        """
+        Run LanguageTool over several texts, spread across the pool's servers when there is one.
+        Returns one result per text: its matches, or the exception its check raised.
+        """
+        if self.pool is not None:
+            return self.pool.check_many(texts)
+
+        results = []
+        for text in texts:
+            try:
+                results.append(self.tool.check(text))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _correct_sentences_batched(self, text, sentences, spans):
+        """
+        Check large batches of consecutive sentences with a single LanguageTool call each,
+        then map each match back to its sentence and apply the fixes locally.
+        """
+        corrected_sentences = []
+        issue_counts = []
+
+        # Group consecutive sentences until a batch would exceed batch_chars (always at least one sentence)
+        batches = []
+        batch_start = 0
+        while batch_start < len(sentences):
+            batch_end = batch_start + 1
+            text_start = spans[batch_start][0]
+            while batch_end < len(sentences) and spans[batch_end][1] - text_start <= self.batch_chars:
+                batch_end += 1
+            batches.append((batch_start, batch_end))
+            batch_start = batch_end
+
+        batch_texts = [text[spans[start][0]:spans[end - 1][1]] for start, end in batches]
+        for (batch_start, batch_end), matches in zip(batches, self.check_many(batch_texts)):
+            batch_spans = spans[batch_start:batch_end]
+            batch_sentences = sentences[batch_start:batch_end]
+            text_start = batch_spans[0][0]
+
+            if isinstance(matches, Exception):
+                logger.warning("Batch check failed (%s), falling back to per-sentence correction.", matches)
+                fallback_sentences, fallback_counts = self._correct_sentences_individually(batch_sentences)
+                corrected_sentences.extend(fallback_sentences)
+                issue_counts.extend(fallback_counts)
+                continue
+
+            # Assign matches to sentences by their offset
+            starts = [start - text_start for start, _ in batch_spans]
+            per_sentence = [[] for _ in batch_sentences]
+            counts = [0] * len(batch_sentences)
+            for match in matches:
+                idx = bisect_right(starts, match.offset) - 1
+                if idx < 0:
+                    continue
+                local_offset = match.offset - starts[idx]
+                length = _match_error_length(match)
+                # Matches in the gap between sentences or spanning a boundary (e.g. cross-sentence rules)
+                # are never reported for a single sentence, so they are neither counted nor applied
+                if local_offset + length > len(batch_sentences[idx]):
+                    continue
+                counts[idx] += 1
+                if match.replacements:
+                    per_sentence[idx].append((local_offset, length, match.replacements[0]))
+
+            for sentence, fixes in zip(batch_sentences, per_sentence):
+                corrected_sentences.append(apply_matches(sentence, fixes))
+            issue_counts.extend(counts)
+
+        return corrected_sentences, issue_counts
+
+    def _correct_sentences_individually(self, sentences):
+        """Check and correct each sentence with its own LanguageTool call."""
+        corrected_sentences = []
+        issue_counts = []
+        for sentence, matches in zip(sentences, self.check_many(sentences)):
+            if isinstance(matches, Exception):
+                logger.warning("Error correcting sentence: '%s' → %s", sentence, matches)
+                corrected_sentences.append(sentence)
+                issue_counts.append(0)
+                continue
+            fixes = [
+                (m.offset, _match_error_length(m), m.replacements[0])
+                for m in matches if m.replacements
             ]
+            corrected_sentences.append(apply_matches(sentence, fixes))
+            issue_counts.append(len(matches))
+        return corrected_sentences, issue_counts
+
+    def correct_sentences_tr_with_llm(self, sentences, metrics=None):
+        """
+        Correct Turkish sentences in batches: many numbered sentences are packed into one
+        prompt sized to the model's context, and the numbered reply is parsed back.
+        Sentences missing from the reply are retried one at a time.
+        """
+        corrected = [None] * len(sentences)
+        # Prompts carry each sentence on one line, so replies are compared with that form
+        normalized = [' '.join(sentence.split()) for sentence in sentences]
+        for batch in self._tr_batches(sentences):
+            numbered = "\n".join(f"{n}. {normalized[i]}" for n, i in enumerate(batch, 1))
+            prompt = self._tr_batch_prompt(numbered)
+            logger.debug("Sending %s sentences to LLM for correction...", len(batch))
+            try:
+                # The reply repeats the numbered list, so its budget follows the list's length
+                reply = self.llm.complete(prompt, style="grammar",
+                                          max_tokens=self.llm.output_token_budget(numbered, "grammar"),
+                                          metrics=metrics)
+                items = parse_numbered_lines(reply)
+            except Exception as e:
+                logger.warning("LLM batch error → %s", e)
+                items = {}
 
-            corrected_text = ' '.join(corrected_sentences)
-            return corrected_text, correction_list
+            for n, i in enumerate(batch, 1):
+                if items.get(n):
+                    # An unchanged reply keeps the sentence's original line breaks and spacing
+                    corrected[i] = sentences[i] if items[n] == normalized[i] else items[n]
 
-        elif self.lang == 'tr':
-            for sentence in sentences:
-                try:
-                    corrected_sentence = self.correct_sentence_tr_with_llm(sentence)
-                    corrected_sentences.append(corrected_sentence)
-                    if sentence != corrected_sentence:
-                        corrections.append({
-                            "original": sentence,
-                            "corrected": corrected_sentence
-                        })
-                except Exception as e:
-                    print(f"[Warning] LLM error on sentence: '{sentence}' → {e}")
-                    corrected_sentences.append(sentence)
-
-            corrected_text = ' '.join(corrected_sentences)
-            return corrected_text, corrections
-
-    def correct_sentence_tr_with_llm(self, sentence):
-        """Use LLM to correct a single Turkish sentence."""
+        for i, sentence in enumerate(sentences):
+            if corrected[i] is not None:
+                continue
+            try:
+                corrected[i] = self.correct_sentence_tr_with_llm(sentence, metrics)
+            except Exception as e:
+                logger.warning("LLM error on sentence: '%s' → %s", sentence, e)
+                corrected[i] = sentence
+        return corrected
+
+    @staticmethod
+    def _tr_batch_prompt(numbered):
+        return (
+            f"Aşağıdaki numaralı cümlelerde yazım veya dil bilgisi hatası varsa düzelt.\n"
+            f"Her cümleyi aynı numarayla ve her satırda bir cümle olacak şekilde döndür. "
+            f"Hata yoksa cümleyi aynen döndür.\n\n"
+            f"{numbered}"
+        )
+
+    def _tr_batches(self, sentences):
+        """
+        Group sentence indices so each prompt, its numbered sentences and the reply's output
+        budget (output_token_budget for "grammar") fit the model's context together.
+        """
+        from src.style_transform import OUTPUT_TOKEN_MARGIN
+
+        instruction_tokens = self.llm.count_tokens(self._tr_batch_prompt(""))
+        # The reply may use up to output_ratio tokens per input token, plus the fixed margin
+        ratio = self.llm.output_ratio("grammar")
+        budget_tokens = max(1, int((self.llm.context_tokens - instruction_tokens - OUTPUT_TOKEN_MARGIN) / (1 + ratio)))
+
+        batches = []
+        current = []
+        current_tokens = 0
+        for i, sentence in enumerate(sentences):
+            size = self.llm.count_tokens(f"{len(current) + 1}. {' '.join(sentence.split())}\n")
+            if current and current_tokens + size > budget_tokens:
+                batches.append(current)
+                current, current_tokens = [], 0
+                size = self.llm.count_tokens(f"1. {' '.join(sentence.split())}\n")
+            current.append(i)
+            current_tokens += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def correct_sentence_tr_with_llm(self, sentence, metrics=None):
+        """
+        Use LLM to correct a single Turkish sentence.
+        An unchanged reply returns `sentence` itself, with its original line breaks and spacing.
+        """
+        normalized = ' '.join(sentence.split())
         prompt = (
             f"Aşağıdaki cümlede yazım veya dil bilgisi hatası varsa düzelt:\n"
-            f"{sentence}\n"
+            f"{normalized}\n"
             f"Sadece düzeltilmiş cümleyi döndür. Eğer hata yoksa cümleyi aynen döndür."
         )
-        print(f"[DEBUG] Sending sentence to LLM for correction:\n{sentence}")
-        corrected = self.llm.transform(prompt, style="grammar")
-        return corrected.strip()
+        logger.debug("Sending sentence to LLM for correction:\n%s", normalized)
+        max_tokens = self.llm.output_token_budget(normalized, "grammar")
+        corrected = self.llm.complete(prompt, style="grammar", max_tokens=max_tokens, metrics=metrics).strip()
+        return sentence if ' '.join(corrected.split()) == normalized else corrected
 
     def __del__(self):
+        # Pooled servers outlive this preprocessor; only a private in-process tool is closed here
         if self.lang == 'en' and self.tool is not None:
             try:
                 self.tool.close()
             except Exception as e:
-                print(f"[Warning] Failed to close LanguageTool: {e}")
+                logger.warning("Failed to close LanguageTool: %s", e)
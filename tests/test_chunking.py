@@ -0,0 +1,65 @@
+# tests/test_chunking.py
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from corpus import generate_corpus  # noqa: E402
+from src.chunking import chunk_sentences, estimate_tokens, merge_sentence_chunks  # noqa: E402
+
+# Punctuation split, so the test does not depend on the NLTK punkt data being installed
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split(text):
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+
+def round_trip(text, budget, overlap_sentences=1):
+    """Chunk a text and merge the untransformed chunks back, as an identity transform would."""
+    sentences = split(text)
+    chunks, carried = chunk_sentences(sentences, budget, estimate_tokens, overlap_sentences)
+    max_overlap = [count + 1 if count else 0 for count in carried]
+    merged = merge_sentence_chunks([split(chunk) for chunk in chunks], max_overlap=max_overlap)
+    return sentences, merged
+
+
+def test_identity_transform_keeps_every_sentence():
+    for lang in ("en", "tr"):
+        text = generate_corpus(lang, 20000)
+        for budget in (40, 120, 400):
+            sentences, merged = round_trip(text, budget)
+            assert merged == sentences, (lang, budget)
+
+
+def test_repeated_sentences_are_kept():
+    text = " ".join(["Bu cümle bir örnek cümledir."] * 60 + ["Bu cümle başka bir örnek cümledir."] * 40)
+    for budget in (40, 120, 400):
+        sentences, merged = round_trip(text, budget)
+        assert merged == sentences, budget
+
+
+def test_paraphrased_overlap_is_dropped():
+    chunks = [
+        ["A first point here.", "The teacher explains the new policy in great detail."],
+        ["The teacher explains the new policy.", "In great detail.", "Then something else happens now."],
+    ]
+    assert merge_sentence_chunks(chunks, max_overlap=2) == [
+        "A first point here.", "The teacher explains the new policy in great detail.",
+        "Then something else happens now."
+    ]
+
+
+def test_dropped_carry_over_disables_dedupe():
+    # The long sentence cannot be carried (over half the budget), so the next chunk starts fresh
+    # and its opening sentence, although it looks like the previous tail, must be kept
+    long = "The committee reviewed every item on the agenda before lunch."
+    sentences = ["Short one.", long, "The committee reviewed every item on the agenda.", "Done."]
+    chunks, carried = chunk_sentences(sentences, 30, estimate_tokens, 1)
+    assert len(chunks) == 2 and carried == [0, 0]
+    max_overlap = [count + 1 if count else 0 for count in carried]
+    assert merge_sentence_chunks([split(chunk) for chunk in chunks], max_overlap=max_overlap) == sentences
+    # A fixed limit would wrongly drop the near-duplicate opening sentence
+    assert merge_sentence_chunks([split(chunk) for chunk in chunks], max_overlap=2) != sentences
@@ -0,0 +1,103 @@
+# tests/test_completion_cache.py
+import itertools
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import completion_cache  # noqa: E402
+from src.completion_cache import CompletionCache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def ticking_clock(monkeypatch):
+    """Every access gets a later timestamp, so LRU order does not depend on the clock's resolution."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(completion_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def open_cache(tmp_path, **kwargs):
+    return CompletionCache(tmp_path / "completions.sqlite", **kwargs)
+
+
+def put(cache, prompt, completion):
+    cache.put("model", prompt, 0.7, 64, completion)
+
+
+def get(cache, prompt):
+    return cache.get("model", prompt, 0.7, 64)
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = open_cache(tmp_path, max_bytes=30)
+    for prompt in "abc":
+        put(cache, prompt, "x" * 10)
+    # Reading "a" makes "b" the least recently used entry
+    assert get(cache, "a") == "x" * 10
+    put(cache, "d", "x" * 10)
+
+    assert get(cache, "b") is None
+    assert [get(cache, prompt) for prompt in "acd"] == ["x" * 10] * 3
+    assert cache.stats()["bytes"] == 30
+    cache.close()
+
+
+def test_replacing_an_entry_keeps_the_running_total(tmp_path):
+    cache = open_cache(tmp_path, max_bytes=30)
+    put(cache, "a", "x" * 20)
+    put(cache, "a", "y" * 5)
+    assert cache._total == cache._stored_bytes() == 5
+
+    # The smaller replacement freed room, so these fit without evicting anything
+    put(cache, "b", "x" * 10)
+    put(cache, "c", "x" * 15)
+    assert cache._total == cache._stored_bytes() == 30
+    assert cache.stats()["entries"] == 3
+
+    put(cache, "b", "z" * 12)
+    assert cache._total == cache._stored_bytes() <= 30
+    assert get(cache, "b") == "z" * 12
+    cache.close()
+
+
+def test_total_is_loaded_from_an_existing_file(tmp_path):
+    cache = open_cache(tmp_path)
+    put(cache, "a", "x" * 7)
+    cache.close()
+
+    reopened = open_cache(tmp_path)
+    assert reopened._total == 7
+    assert get(reopened, "a") == "x" * 7
+    reopened.close()
+
+
+def test_bypass_skips_reads_and_writes(tmp_path):
+    cache = open_cache(tmp_path)
+    put(cache, "a", "cached")
+    cache.close()
+
+    bypassed = open_cache(tmp_path, bypass=True)
+    put(bypassed, "b", "new")
+    assert get(bypassed, "a") is None
+    assert bypassed.hits == bypassed.misses == 0
+    assert bypassed.stats()["entries"] == 1
+    bypassed.close()
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = open_cache(tmp_path)
+    assert get(cache, "a") is None
+    put(cache, "a", "cached")
+    assert get(cache, "a") == "cached"
+    assert get(cache, "a") == "cached"
+    assert cache.get("other-model", "a", 0.7, 64) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    cache.clear()
+    assert cache._total == 0 and cache.stats()["entries"] == 0
+    cache.close()
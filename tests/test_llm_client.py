@@ -0,0 +1,137 @@
+# tests/test_llm_client.py
+import json
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from fake_llm_server import FakeLLMHandler, start_server  # noqa: E402
+from src.llm_client import LLMConnectionError, LLMResponseError, LMStudioClient  # noqa: E402
+
+PROMPT = "Rewrite the following text:\nThe cat sat on the mat.\nReturn only the edited version."
+REPLY = "The cat sat on the mat."
+
+
+@pytest.fixture
+def serve():
+    """Start fake LM Studio servers with the given handler; all are shut down after the test."""
+    servers = []
+
+    def start(handler=FakeLLMHandler):
+        server, url = start_server(handler=handler)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def client_for(url, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    return LMStudioClient(base_url=url, read_timeout=5, **kwargs)
+
+
+def test_chat_returns_reply_and_usage(serve):
+    client = client_for(serve())
+    content, usage = client.chat_completion("fake", PROMPT)
+    assert content == REPLY
+    assert usage["completion_tokens"] == 6
+    assert usage["finish_reason"] == "stop"
+
+
+def test_server_error_is_retried(serve):
+    requests_seen = []
+
+    class FlakyHandler(FakeLLMHandler):
+        def do_POST(self):
+            requests_seen.append(self.path)
+            if len(requests_seen) == 1:
+                self.send_error(503, "Model is loading")
+                return
+            super().do_POST()
+
+    client = client_for(serve(FlakyHandler), max_retries=3)
+    assert client.chat("fake", PROMPT) == REPLY
+    assert len(requests_seen) == 2
+
+
+def test_persistent_server_error_raises_response_error(serve):
+    class BrokenHandler(FakeLLMHandler):
+        def do_POST(self):
+            self.send_error(500, "Internal error")
+
+    with pytest.raises(LLMResponseError) as error:
+        client_for(serve(BrokenHandler), max_retries=2).chat("fake", PROMPT)
+    assert error.value.status_code == 500
+
+
+def test_refused_connection_raises_after_all_retries():
+    # Bind and release a port so nothing is listening on it
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = client_for(f"http://127.0.0.1:{port}/v1", max_retries=2)
+    attempts = []
+    post = client.session.post
+
+    def counting_post(*args, **kwargs):
+        attempts.append(args[0])
+        return post(*args, **kwargs)
+
+    client.session.post = counting_post
+    with pytest.raises(LLMConnectionError):
+        client.chat("fake", PROMPT)
+    assert len(attempts) == 3
+
+
+def test_invalid_json_body_raises_response_error(serve):
+    class GarbageHandler(FakeLLMHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = b"<html>not json</html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    with pytest.raises(LLMResponseError):
+        client_for(serve(GarbageHandler)).chat("fake", PROMPT)
+
+
+def test_stream_yields_pieces_and_usage(serve):
+    usage = {}
+    pieces = list(client_for(serve()).stream_chat("fake", PROMPT, usage=usage))
+    assert len(pieces) > 1
+    assert "".join(pieces) == REPLY
+    assert usage["completion_tokens"] == 6
+    assert usage["finish_reason"] == "stop"
+
+
+@pytest.mark.parametrize("tail", [
+    b'data: {"choices": [{"index": 0, "delta": {"content": " mat',  # cut off inside an event
+    b"",  # cut off between events, before the finish reason and [DONE]
+])
+def test_stream_cut_off_raises_connection_error(serve, tail):
+    class CutOffHandler(FakeLLMHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            event = {"choices": [{"index": 0, "delta": {"content": "The cat"}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8") + tail)
+            self.close_connection = True
+
+    pieces = []
+    with pytest.raises(LLMConnectionError):
+        for piece in client_for(serve(CutOffHandler)).stream_chat("fake", PROMPT):
+            pieces.append(piece)
+    assert pieces == ["The cat"]
@@ -0,0 +1,76 @@
+# tests/test_model_registry.py
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import model_registry  # noqa: E402
+from src.model_registry import ModelRegistry, registry  # noqa: E402
+from src.pipeline import build_components  # noqa: E402
+
+HF_MODEL = "prithivida/parrot_paraphraser_on_T5"
+
+
+class StubTokenizer:
+    pad_token = None
+    eos_token = "</s>"
+    padding_side = "right"
+    model_max_length = 512
+
+    def encode(self, text, add_special_tokens=True):
+        return text.split()
+
+
+class StubModel:
+    config = types.SimpleNamespace(is_encoder_decoder=True)
+
+
+@pytest.fixture
+def loads(monkeypatch, tmp_path):
+    """Replace the HF loader with a stub and record every model it is asked to load."""
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    def load(model_name, dtype=None, device="cpu"):
+        calls.append((model_name, dtype, device))
+        return StubTokenizer(), StubModel()
+
+    monkeypatch.setattr(model_registry, "load_hf_model", load)
+    registry.clear()
+    yield calls
+    registry.clear()
+
+
+def test_hf_components_load_weights_once(loads):
+    first, _ = build_components(HF_MODEL, lang="tr", use_cache=False, mode="hf")
+    second, _ = build_components(HF_MODEL, lang="tr", use_cache=False, mode="hf")
+
+    assert loads == [(HF_MODEL, None, "cpu")]
+    assert first.mode == second.mode == "hf"
+    assert second.hf_model is first.hf_model
+    assert registry.loaded() == {(HF_MODEL, None, "cpu"): 2}
+
+    first.close()
+    second.close()
+    assert registry.loaded() == {(HF_MODEL, None, "cpu"): 0}
+
+
+def test_lm_studio_is_the_default_backend(loads):
+    transformer, _ = build_components(HF_MODEL, lang="tr", use_cache=False)
+    assert transformer.mode == "lm_studio"
+    assert loads == []
+
+
+def test_unreferenced_models_are_evicted_oldest_first(loads):
+    models = ModelRegistry(max_resident=2)
+    for name in ("a", "b", "c"):
+        models.acquire(name)
+    models.release("a")
+    models.release("b")
+    models.acquire("d")
+    # "a" and "b" were unreferenced and oldest; "c" and "d" are still in use
+    assert list(models.loaded()) == [("c", None, "cpu"), ("d", None, "cpu")]
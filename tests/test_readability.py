@@ -0,0 +1,58 @@
+# tests/test_readability.py
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.readability import get_readability_scores, get_readability_scores_batch  # noqa: E402
+
+textstat = pytest.importorskip("textstat")
+
+PARAGRAPH = (
+    "The committee reviewed the proposal carefully before the meeting. Several members raised concerns "
+    "about the budget. After a long discussion, they agreed to postpone the decision until the next quarter. "
+    "The chairman thanked everyone for their patience, and the meeting ended early. "
+    "Nobody expected such a quick resolution."
+)
+
+TEXTSTAT_METRICS = {
+    "flesch_reading_ease": "flesch_reading_ease",
+    "flesch_kincaid_grade": "flesch_kincaid_grade",
+    "smog_index": "smog_index",
+    "automated_readability_index": "automated_readability_index",
+    "dale_chall_score": "dale_chall_readability_score",
+}
+
+
+@pytest.fixture
+def pyphen_textstat(monkeypatch):
+    """textstat with pyphen syllable counts, the ones the engine uses (newer releases prefer CMUdict)."""
+    try:
+        from textstat.backend.counts import _count_syllables
+    except ImportError:
+        return textstat
+    monkeypatch.setattr(_count_syllables, "get_cmudict", lambda lang: None)
+    if hasattr(_count_syllables.count_syllables, "cache_clear"):
+        _count_syllables.count_syllables.cache_clear()
+    return textstat
+
+
+def test_english_scores_match_textstat(pyphen_textstat):
+    scores = get_readability_scores(PARAGRAPH, "en")
+    for metric, function in TEXTSTAT_METRICS.items():
+        expected = getattr(pyphen_textstat, function)(PARAGRAPH)
+        assert scores[metric] == pytest.approx(expected, abs=0.01), metric
+
+
+def test_smog_needs_three_sentences():
+    assert get_readability_scores("The cat sat on the mat. It was very happy there.", "en")["smog_index"] == 0.0
+    assert get_readability_scores(PARAGRAPH, "en")["smog_index"] > 0
+
+
+@pytest.mark.parametrize("lang", ["en", "tr"])
+def test_batch_matches_single_texts(lang):
+    texts = [PARAGRAPH, "Kısa bir metin. Bu da ikinci cümle.", PARAGRAPH, ""]
+    assert get_readability_scores_batch(texts, lang) == [get_readability_scores(text, lang) for text in texts]
@@ -0,0 +1,195 @@
+# tests/test_style_transform.py
+import logging
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+from fake_llm_server import FakeLLMHandler, start_server  # noqa: E402
+from src import model_registry  # noqa: E402
+from src.chunking import estimate_tokens  # noqa: E402
+from src.llm_client import LMStudioClient  # noqa: E402
+from src.model_registry import registry  # noqa: E402
+from src.pipeline import build_components  # noqa: E402
+from src.style_transform import StyleTransformer  # noqa: E402
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+needs_torch = pytest.mark.skipif(torch is None, reason="torch is not installed")
+
+HF_MODEL = "tiny/fake-causal-lm"
+PAD_ID = 0
+
+
+class Encoding(dict):
+    def to(self, device):
+        return self
+
+
+class TinyTokenizer:
+    """Whitespace tokenizer with a growing vocabulary; pads on the side the transformer asks for."""
+
+    pad_token = None
+    eos_token = "<eos>"
+    padding_side = "right"
+    model_max_length = 512
+
+    def __init__(self):
+        self.vocab = {"<pad>": PAD_ID}
+        self.words = ["<pad>"]
+        self.pad_token_id = PAD_ID
+        self.batches = []
+
+    def token_id(self, word):
+        if word not in self.vocab:
+            self.vocab[word] = len(self.words)
+            self.words.append(word)
+        return self.vocab[word]
+
+    def encode(self, text, add_special_tokens=True):
+        return [self.token_id(word) for word in text.split()]
+
+    def __call__(self, texts, return_tensors="pt", padding=False):
+        texts = [texts] if isinstance(texts, str) else texts
+        rows = [self.encode(text) for text in texts]
+        width = max(len(row) for row in rows)
+        ids, mask = [], []
+        for row in rows:
+            pad = [PAD_ID] * (width - len(row))
+            ones = [1] * len(row)
+            if self.padding_side == "left":
+                ids.append(pad + row)
+                mask.append([0] * len(pad) + ones)
+            else:
+                ids.append(row + pad)
+                mask.append(ones + [0] * len(pad))
+        self.batches.append((texts, ids))
+        return Encoding(input_ids=torch.tensor(ids), attention_mask=torch.tensor(mask))
+
+    def decode(self, ids, skip_special_tokens=True):
+        ids = ids.tolist() if hasattr(ids, "tolist") else list(ids)
+        return " ".join(self.words[i] for i in ids if not (skip_special_tokens and i == PAD_ID))
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return [self.decode(row, skip_special_tokens) for row in rows]
+
+
+class TinyModel:
+    """Decoder-only stand-in: echoes the prompt and appends the words w0, w1, ... up to max_new_tokens."""
+
+    config = types.SimpleNamespace(is_encoder_decoder=False)
+    device = "cpu"
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.calls = []
+
+    def generate(self, input_ids, attention_mask=None, max_new_tokens=20, streamer=None):
+        self.calls.append((len(input_ids), max_new_tokens))
+        new = [self.tokenizer.token_id(f"w{i}") for i in range(max_new_tokens)]
+        if streamer is not None:
+            streamer.put(input_ids)
+            for token in new:
+                streamer.put(torch.tensor([token]))
+            streamer.end()
+        return torch.tensor([row.tolist() + new for row in input_ids])
+
+
+@pytest.fixture
+def transformer(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    tokenizer = TinyTokenizer()
+    model = TinyModel(tokenizer)
+    monkeypatch.setattr(model_registry, "load_hf_model", lambda *args: (tokenizer, model))
+    registry.clear()
+    transformer, _ = build_components(HF_MODEL, lang="tr", use_cache=False, mode="hf")
+    yield transformer
+    transformer.close()
+    registry.clear()
+
+
+def words(count):
+    return " ".join(f"w{i}" for i in range(count))
+
+
+@needs_torch
+def test_batched_generation_pads_and_keeps_each_budget(transformer):
+    transformer.hf_batch_size = 2
+    prompts = ["a b c", "d", "e f", "g h i j"]
+    budgets = [5, 2, 4, 3]
+
+    outputs = transformer.hf_generate_batch(prompts, budgets)
+
+    assert outputs == [words(budget) for budget in budgets]
+    # Prompts with similar budgets share a generate() call that runs for the largest of them
+    assert transformer.hf_model.calls == [(2, 3), (2, 5)]
+    texts, ids = transformer.hf_tokenizer.batches[0]
+    assert texts == ["d", "g h i j"]
+    # Decoder-only models are padded on the left
+    assert ids[0][:3] == [PAD_ID] * 3 and ids[1][0] != PAD_ID
+
+
+@needs_torch
+def test_streamed_pieces_join_to_the_full_output(transformer):
+    pytest.importorskip("transformers")
+    pieces = list(transformer.stream_complete("a b c", max_tokens=6))
+
+    assert len(pieces) > 1
+    assert "".join(pieces).strip() == transformer.hf_generate_batch(["a b c"], 6)[0] == words(6)
+
+
+@pytest.fixture
+def lm_studio():
+    """Build LM Studio transformers backed by fake servers that end replies with `finish_reason`."""
+    transformers, servers = [], []
+
+    def build(finish_reason="stop", lang="en"):
+        handler = type("Handler", (FakeLLMHandler,), {"finish_reason": finish_reason})
+        server, url = start_server(handler=handler)
+        servers.append(server)
+        transformer = StyleTransformer(model_name="fake-model", lang=lang, client=LMStudioClient(base_url=url, backoff=0))
+        transformers.append(transformer)
+        return transformer
+
+    yield build
+    for transformer in transformers:
+        transformer.close()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+PROMPT = "Rewrite the following text:\nThe cat sat on the mat. Then the dog ran\nReturn only the edited version."
+
+
+def test_length_finish_is_trimmed_and_logged(lm_studio, caplog):
+    transformer = lm_studio(finish_reason="length")
+    with caplog.at_level(logging.WARNING, logger="src.style_transform"):
+        output = transformer.complete(PROMPT, max_tokens=64)
+    assert output == "The cat sat on the mat."
+    assert "finish_reason=length" in caplog.text
+
+
+def test_stop_finish_is_kept_whole(lm_studio, caplog):
+    # The server's finish_reason wins over token counts that exceed the budget
+    transformer = lm_studio(finish_reason="stop")
+    with caplog.at_level(logging.WARNING, logger="src.style_transform"):
+        output = transformer.complete(PROMPT, max_tokens=4)
+    assert output == "The cat sat on the mat. Then the dog ran"
+    assert "budget" not in caplog.text
+
+
+def test_estimated_budgets_scale_with_language():
+    text = "Öğrencilerimizin değerlendirmelerinden anlaşılacağı üzere, çalışmalarımız başarıyla sonuçlandırılmıştır."
+    english = StyleTransformer(model_name="fake-model", lang="en")
+    turkish = StyleTransformer(model_name="fake-model", lang="tr")
+    assert turkish.count_tokens(text) >= 1.6 * estimate_tokens(text)
+    assert english.count_tokens(text) > estimate_tokens(text)
+    assert turkish.output_token_budget(text, "simple") > english.output_token_budget(text, "simple")
@@ -0,0 +1,164 @@
+# tests/test_text_preprocessing.py
+import re
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.chunking import estimate_tokens  # noqa: E402
+from src.text_preprocessing import TextPreprocessor, build_corrections, locate_sentences, parse_numbered_lines  # noqa: E402
+
+
+class FakeMatch:
+    def __init__(self, offset, length, replacements):
+        self.offset = offset
+        self.errorLength = length
+        self.replacements = replacements
+
+
+class FakeLanguageTool:
+    """Rule-based stand-in for language_tool_python.LanguageTool."""
+
+    RULES = [
+        (re.compile(r"\bteh\b"), "the"),
+        (re.compile(r"\bi\b"), "I"),
+        # Whitespace rule: fires in the gaps between sentences of a batch too
+        (re.compile(r" {2,}"), " "),
+        # Cross-sentence rule: only fires when it sees two sentences together
+        (re.compile(r"\. [a-z]"), None),
+        # Style hint without a replacement
+        (re.compile(r"\bvery\b"), None),
+    ]
+
+    def __init__(self, language=None):
+        self.calls = 0
+
+    def check(self, text):
+        self.calls += 1
+        matches = []
+        for pattern, replacement in self.RULES:
+            for m in pattern.finditer(text):
+                matches.append(FakeMatch(m.start(), m.end() - m.start(), [replacement] if replacement else []))
+        return sorted(matches, key=lambda m: m.offset)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def english(monkeypatch):
+    monkeypatch.setitem(sys.modules, "language_tool_python", types.SimpleNamespace(LanguageTool=FakeLanguageTool))
+    return TextPreprocessor("en")
+
+
+TEXT = (
+    "I think teh results are very good.  then i looked again at teh data. "
+    "The second run was very  slow, i think.   Nothing to fix here. "
+    "teh end is near.  i agree."
+)
+
+
+def test_batched_correction_matches_per_sentence(english):
+    sentences = re.split(r"(?<=\.)\s+", TEXT)
+    spans = locate_sentences(TEXT, sentences)
+    expected = english._correct_sentences_individually(sentences)
+
+    for batch_chars in (1, 40, 90, 20000):
+        english.batch_chars = batch_chars
+        assert english._correct_sentences_batched(TEXT, sentences, spans) == expected, batch_chars
+
+
+def test_batched_correction_uses_one_call_per_batch(english):
+    sentences = re.split(r"(?<=\.)\s+", TEXT)
+    english.tool.calls = 0
+    english.correct_sentences(sentences, TEXT, locate_sentences(TEXT, sentences))
+    assert english.tool.calls == 1
+
+
+class FakeLLM:
+    """Stand-in for StyleTransformer that answers prompts with `respond(prompt)`."""
+
+    context_tokens = 4096
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.prompts = []
+
+    def count_tokens(self, text):
+        return estimate_tokens(text)
+
+    def output_ratio(self, style):
+        return 1.1
+
+    def output_token_budget(self, text, style):
+        return 256
+
+    def complete(self, prompt, style="raw", max_tokens=None, metrics=None):
+        self.prompts.append(prompt)
+        return self.respond(prompt)
+
+
+def echo_numbered(prompt):
+    return "\n".join(line for line in prompt.splitlines() if parse_numbered_lines(line))
+
+
+def is_batch(prompt):
+    return "numaralı" in prompt
+
+
+def single_sentence(prompt):
+    return prompt.splitlines()[1]
+
+
+TR_SENTENCES = ["Bu bir\ncümledir.", "Ikinci  cümle  burada.", "Üçüncü cümle de var."]
+
+
+def test_parse_numbered_lines():
+    reply = "Düzeltilmiş cümleler:\n1. Birinci.\n  2)  İkinci cümle.  \n3 . Üçüncü.\nnot numbered\n2. Tekrar.\n4."
+    assert parse_numbered_lines(reply) == {1: "Birinci.", 2: "İkinci cümle.", 3: "Üçüncü."}
+    assert parse_numbered_lines("") == {}
+
+
+def test_unchanged_turkish_sentences_keep_their_layout():
+    llm = FakeLLM(echo_numbered)
+    pre = TextPreprocessor("tr", llm=llm)
+    corrected, counts = pre.correct_sentences(TR_SENTENCES)
+    assert corrected == TR_SENTENCES
+    assert build_corrections(TR_SENTENCES, corrected, counts) == []
+    assert len(llm.prompts) == 1
+
+
+def test_turkish_correction_is_applied():
+    llm = FakeLLM(lambda prompt: echo_numbered(prompt).replace("Ikinci", "İkinci"))
+    corrected, _ = TextPreprocessor("tr", llm=llm).correct_sentences(TR_SENTENCES)
+    assert corrected == [TR_SENTENCES[0], "İkinci cümle burada.", TR_SENTENCES[2]]
+
+
+def test_missing_and_garbled_items_fall_back_to_single_sentences():
+    def respond(prompt):
+        if is_batch(prompt):
+            # Item 2 is missing and item 3 is empty
+            return "1. Bu bir cümledir.\nSorry, I cannot help with that.\n3. "
+        return single_sentence(prompt)
+
+    llm = FakeLLM(respond)
+    corrected, _ = TextPreprocessor("tr", llm=llm).correct_sentences(TR_SENTENCES)
+    assert corrected == TR_SENTENCES
+    assert len(llm.prompts) == 3
+
+
+def test_failed_calls_keep_the_original_sentences():
+    def respond(prompt):
+        if is_batch(prompt):
+            return "no numbered lines at all"
+        if "Ikinci" in prompt:
+            raise RuntimeError("connection lost")
+        return single_sentence(prompt).replace("Üçüncü", "Üçüncü olarak")
+
+    llm = FakeLLM(respond)
+    corrected, _ = TextPreprocessor("tr", llm=llm).correct_sentences(TR_SENTENCES)
+    assert corrected == [TR_SENTENCES[0], TR_SENTENCES[1], "Üçüncü olarak cümle de var."]